@@ -38,9 +38,17 @@ REP_TYPES = [
     "BLOSUM50",
     "BLOSUM62",
 ]  # Add VAE and MSA-Transformer later
-IN_MEMORY = ["BLOSUM62", "BLOSUM50", "One-hot"]
+IN_MEMORY = ["BLOSUM62", "BLOSUM50", "One-hot", "One-hot (sparse)"]
 TRAIN_TEST_VAL_SPLITS = ["Random"]
-MODEL_TYPES = ["KNN", "Gaussian Process", "Random Forrest", "Ridge", "SVM"]
+MODEL_TYPES = [
+    "KNN",
+    "Gaussian Process",
+    "Sparse Gaussian Process",
+    "Random Forrest",
+    "Ridge",
+    "SVM",
+]
+GP_MODEL_TYPES = ["Gaussian Process", "Sparse Gaussian Process"]
 MODEL_DICT = {
     "Random Forrest": "rf",
     "KNN": "knn",
@@ -49,11 +57,13 @@ MODEL_DICT = {
     "ESM-2": "esm2",
     "ESM-1v": "esm1v",
     "Gaussian Process": "gp",
+    "Sparse Gaussian Process": "sgp",
     "ESM-Fold": "esm_fold",
     "Ridge": "ridge",
 }
 REP_DICT = {
     "One-hot": "ohe",
+    "One-hot (sparse)": "ohe_sparse",
     "BLOSUM50": "blosum50",
     "BLOSUM62": "blosum62",
     "ESM-2": "esm2",
@@ -69,16 +79,20 @@ BATCH_SIZE = 1
 ZS_MODELS = ["ESM-1v", "ESM-2"]
 FOLDING_MODELS = ["ESM-Fold"]
 ACQUISITION_FNS = ["Expected Improvement", "Upper Confidence Bound", "Greedy"]
+BATCH_ACQUISITION_FNS = ["Batch Expected Improvement (q-EI)", "Kriging Believer"]
 ACQ_DICT = {
     "Expected Improvement": "ei",
     "Upper Confidence Bound": "ucb",
     "Greedy": "greedy",
+    "Batch Expected Improvement (q-EI)": "qei",
+    "Kriging Believer": "kb",
 }
 USR_PATH = os.path.join(app_path, "../usrs")
 SEARCH_HEURISTICS = ["Diversity"]
 OPTIM_DICT = {"Maximize Y-values": "max", "Minimize Y-values": "min"}
 MAX_EVAL_DICT = {
     "ohe": 10000,
+    "ohe_sparse": 10000,
     "blosum62": 10000,
     "blosum50": 10000,
     "esm2": 200,
@@ -736,7 +750,7 @@ def server(input: Inputs, output: Outputs, session: Session):
                         ),
                     ),
                     ui.panel_conditional(
-                        "input.model_type !== 'Gaussian Process'",
+                        "input.model_type !== 'Gaussian Process' && input.model_type !== 'Sparse Gaussian Process'",
                         ui.column(
                             6,
                             ui.input_numeric(
@@ -787,13 +801,16 @@ def server(input: Inputs, output: Outputs, session: Session):
         if MODEL() is not None:
             inv_model_dict = {value: key for key, value in MODEL_DICT.items()}
             model_type = inv_model_dict[MODEL().model_type]
+            acquisition_fns = ACQUISITION_FNS
+            if model_type in GP_MODEL_TYPES:
+                acquisition_fns = ACQUISITION_FNS + BATCH_ACQUISITION_FNS
             return ui.TagList(
                 ui.h5("Search new mutants"),
                 ui.row(
                     ui.column(
                         6,
                         ui.input_select(
-                            "acquisition_fn", "Acquisition Function", ACQUISITION_FNS
+                            "acquisition_fn", "Acquisition Function", acquisition_fns
                         ),
                     ),
                     ui.column(
@@ -855,7 +872,7 @@ def server(input: Inputs, output: Outputs, session: Session):
                         ),
                     ),
                     ui.panel_conditional(
-                        "input.discovery_model_type !== 'Gaussian Process'",
+                        "input.discovery_model_type !== 'Gaussian Process' && input.discovery_model_type !== 'Sparse Gaussian Process'",
                         ui.column(
                             6,
                             ui.input_numeric(
@@ -1077,7 +1094,7 @@ def server(input: Inputs, output: Outputs, session: Session):
                 y_type = "class"
                 choice = "Classification"
                 _y_type = "Categorical"
-                _MODEL_TYPES.set([x for x in MODEL_TYPES if x != "Gaussian Process"])
+                _MODEL_TYPES.set([x for x in MODEL_TYPES if x not in GP_MODEL_TYPES])
 
             lib = pai.Library(
                 user=input.USER().lower(),
@@ -63,6 +63,12 @@ parser.add_argument(
 parser.add_argument(
     "--k_folds", type=int, default=5, help="K-fold cross validation for sk_learn models"
 )
+parser.add_argument(
+    "--retrain-every",
+    type=int,
+    default=1,
+    help="Fully retrain GP models every N rounds, update them incrementally in between.",
+)
 
 
 def benchmark(dataset, fasta, model, embedding, name, sample_size, results_df):
@@ -212,10 +218,18 @@ def benchmark(dataset, fasta, model, embedding, name, sample_size, results_df):
             "val": sampled_data[n_train + n_test :],
         }
 
-        # train model on new data
-        model.train(
-            library=lib, x=REP, split=split, seed=SEED, model_type=MODEL, k_folds=K_FOLD
-        )
+        # train model on new data, or condition GPs on the new sample in between full retrains
+        if MODEL in ["gp", "sgp"] and (iteration - 1) % RETRAIN_EVERY != 0:
+            model.update(sample)
+        else:
+            model.train(
+                library=lib,
+                x=REP,
+                split=split,
+                seed=SEED,
+                model_type=MODEL,
+                k_folds=K_FOLD,
+            )
 
         # add to results
         results_df = add_to_data(
@@ -315,6 +329,7 @@ BATCH_SIZE = args.batch_size
 IMPROVEMENT = args.improvement
 ACQ_FN = args.acquisition_fn
 K_FOLD = args.k_folds
+RETRAIN_EVERY = args.retrain_every
 
 # benchmark data
 datasets = [f for f in os.listdir(BENCHMARK_FOLDER) if f.endswith(".csv")]
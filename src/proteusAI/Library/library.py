@@ -12,7 +12,11 @@ import proteusAI.io_tools as io_tools
 import proteusAI.visual_tools as vis
 import proteusAI.struc as pai_struc
 import pandas as pd
-from proteusAI.Protein.protein import Protein
+import torch
+import scipy.sparse as sp
+from collections import OrderedDict
+from collections.abc import Sequence
+from proteusAI.Protein.protein import ProteinRecord
 from typing import Union, Optional
 from sklearn.preprocessing import LabelEncoder
 
@@ -23,6 +27,90 @@ folder_path = os.path.dirname(os.path.realpath(__file__))
 USR_PATH = os.path.join(folder_path, "../../../usrs")
 
 
+def _column_property(column: str):
+    """
+    Property that reads and writes the value of a record in a library column.
+    """
+
+    def fget(self):
+        return getattr(self._library, column)[self._index]
+
+    def fset(self, value):
+        getattr(self._library, column)[self._index] = value
+
+    return property(fget, fset)
+
+
+class LibraryRecord(ProteinRecord):
+    """
+    ProteinRecord of a protein in a Library. Labels, predictions and acquisition
+    scores are read from and written to the library columns, so records and
+    columns always agree.
+
+    Args:
+        library (Library): library holding the columns.
+        index (int): row of the protein in the library.
+    """
+
+    __slots__ = ("_library", "_index")
+
+    y = _column_property("y")
+    y_pred = _column_property("y_pred")
+    y_sigma = _column_property("y_sigma")
+    acq_score = _column_property("acq_score")
+
+    def __init__(self, library, index: int):
+        self._library = library
+        self._index = index
+        self.name = library.names[index]
+        self.seq = library.seqs[index]
+        self.reps = ()
+
+
+class LazyProteinList(Sequence):
+    """
+    List-like view of the proteins of a Library, backed by the library columns
+    (names, seqs, y, y_pred, y_sigma, acq_score). LibraryRecord objects are created
+    on first access and kept, changes to their labels and predictions are
+    written to the library columns.
+
+    Args:
+        library (Library): library holding the columns.
+    """
+
+    def __init__(self, library):
+        self.library = library
+        self._proteins = {}
+
+    def __len__(self):
+        return len(self.library.seqs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("protein index out of range")
+
+        protein = self._proteins.get(index)
+        if protein is None:
+            protein = self.library._make_protein(index)
+            self._proteins[index] = protein
+        return protein
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def materialized(self) -> dict:
+        """
+        Returns the proteins that have been created so far, keyed by index.
+        """
+        return self._proteins
+
+
 class Library:
     """
     The Library object holds information about proteins, labels and representations.
@@ -33,14 +121,23 @@ class Library:
     Attributes:
         usr (str): User name - determines where data will be stored. default: Guest
         data (str): Path to data file ().
-        proteins (list): List of proteins.
+        proteins (LazyProteinList): List of proteins.
     """
 
     # TODO: add VAEs too
 
-    representation_types = ["esm1v", "esm2", "ohe", "blosum62", "blosum50", "vae"]
+    representation_types = [
+        "esm1v",
+        "esm2",
+        "ohe",
+        "ohe_sparse",
+        "blosum62",
+        "blosum50",
+        "vae",
+    ]
     _allowed_y_types = ["class", "num"]
-    in_memory = ["ohe", "blosum62", "blosum50"]
+    in_memory = ["ohe", "ohe_sparse", "blosum62", "blosum50"]
+    max_rep_cache_memory = 2 * 1024**3  # bytes of cached in-memory representations
 
     def __init__(
         self,
@@ -92,12 +189,18 @@ class Library:
         self.seqs = None
         self.y = None
         self.y_pred = None
+        self.y_sigma = None
+        self.acq_score = None
         self.names = None
+        self.proteins = []
         self.reps = self.in_memory.copy()
         self.source_path = None
         self.rep_path = None
         self.strucs = None
         self.struc_path = None
+        self._rep_cache = OrderedDict()
+        self._rep_stores = {}
+        self._padding = None
         self.class_dict = None
         self.pred_data = False
 
@@ -172,9 +275,12 @@ class Library:
         self.reps = data["reps"]
         self.class_dict = data["class_dict"]
 
-        # Parsing arguments
+        # Parsing arguments, sequences can be passed separately (e.g. built lazily)
         df = data["df"]
-        self.seqs = df[self.seq_col].to_list()
+        if "seqs" in data.keys():
+            self.seqs = data["seqs"]
+        else:
+            self.seqs = df[self.seq_col].to_list()
         self.names = df[self.names_col].to_list()
         self.y_type = data["y_type"]
         self.data = df
@@ -211,20 +317,7 @@ class Library:
             self.pred_data = data["pred_data"]
 
         # create proteins
-        self.proteins = [
-            Protein(
-                name,
-                seq,
-                y=y,
-                y_pred=y_pred,
-                y_sigma=y_sigma,
-                acq_score=acq_score,
-                user=self.user,
-            )
-            for name, seq, y, y_pred, y_sigma, acq_score in zip(
-                self.names, self.seqs, self.y, self.y_pred, self.y_sigma, self.acq_score
-            )
-        ]
+        self._set_proteins()
 
     def initialize_user(self):
         """
@@ -246,25 +339,19 @@ class Library:
             print(f"User created at {self.user}")
 
         # check if sequence have been provided
-        if len(self.seqs) > 0:
+        if self.seqs:
             # create dummy names if no names are provided
-            if len(self.seqs) != len(self.names):
+            if self.names is None or len(self.seqs) != len(self.names):
                 print(
-                    f"Number of sequences ({len(self.seqs)}), does not match the number of names ({len(self.names)})"
+                    f"Number of sequences ({len(self.seqs)}), does not match the number of names"
                 )
                 print("Dummy names will be created")
                 self.names = [f"protein_{i}" for i in range(len(self.seqs))]
 
-            # create protein objects TODO: This is the slow step
-            if len(self.y) == len(self.names):
-                for name, seq, y in zip(self.names, self.seqs, self.y):
-                    protein = Protein(name, seq, y=y)
-                    self.proteins.append(protein)
+            if self.y is not None and len(self.y) != len(self.names):
+                self.y = None
 
-            else:
-                for name, seq in zip(self.names, self.seqs):
-                    protein = Protein(name, seq)
-                    self.proteins.append(protein)
+            self._set_proteins()
 
         print("Done!")
 
@@ -391,14 +478,14 @@ class Library:
                 "The provided column names do not match the columns in the data file."
             )
 
+        self.seqs = df[seqs].tolist()
+
         # If names are not provided, generate dummy names
         if names not in df.columns:
             self.names = [f"protein_{i}" for i in range(len(self.seqs))]
         else:
             self.names = df[names].tolist()
 
-        self.seqs = df[seqs].tolist()
-
         # Handle y values
         if y is not None:
             self.y = df[y].tolist()
@@ -406,17 +493,7 @@ class Library:
             if y_type == "class":
                 self.y, self.class_dict = self._encode_categorical_labels(self.y)
 
-            # Create protein objects with y values
-            self.proteins = [
-                Protein(name, seq, y=y, user=self.user)
-                for name, seq, y in zip(self.names, self.seqs, self.y)
-            ]
-        else:
-            # Create protein objects without y values
-            self.proteins = [
-                Protein(name, seq, user=self.user)
-                for name, seq in zip(self.names, self.seqs)
-            ]
+        self._set_proteins()
 
         if check_rep:
             self._check_reps()
@@ -437,8 +514,8 @@ class Library:
         self.seqs = sequences
 
         # Create protein objects from names and sequences
-        self.proteins = [Protein(name, seq) for name, seq in zip(self.names, self.seqs)]
-        self.y = [None] * len(self.proteins)
+        self.y = [None] * len(self.seqs)
+        self._set_proteins()
         df = pd.DataFrame({"names": names, "sequence": self.seqs, "y": self.y})
         self.data = df
 
@@ -449,20 +526,67 @@ class Library:
         """
         Check for available representations, store in protein object if representation is found
         """
-        reps = [r for r in os.listdir(self.rep_path) if not r.startswith(".")]
-        if len(reps) > 0:
-            for rep in reps:
-                rep_names = [
-                    f
-                    for f in os.listdir(os.path.join(self.rep_path, rep))
-                    if f.endswith(".pt")
-                ]
-                if len(rep_names) >= len(set(self.names)):
-                    self.reps.insert(0, rep)  # Insert representation at the front
-                    for protein in self.proteins:
-                        f_name = protein.name + ".pt"
-                        if os.path.exists(os.path.join(self.rep_path, rep, f_name)):
-                            protein._reps.insert(0, rep)
+        for rep in self.representation_types:
+            if rep in self.in_memory or not os.path.isdir(
+                os.path.join(self.rep_path, rep)
+            ):
+                continue
+            store = self._get_store(rep)
+            if len(store) >= len(set(self.names)) and rep not in self.reps:
+                self.reps.insert(0, rep)  # Insert representation at the front
+            for protein in self.proteins.materialized().values():
+                if protein.name in store:
+                    protein.add_rep(rep)
+
+    def _get_store(self, rep: str):
+        """
+        Returns the embedding store of a representation type. Stores are opened
+        once per library and refreshed from their manifest on later calls.
+
+        Args:
+            rep (str): representation type.
+
+        Returns:
+            EmbeddingStore: the store.
+        """
+        if self.rep_path is None:
+            rep_path = os.path.join(self.user, f"rep/{rep}")
+        else:
+            rep_path = os.path.join(self.rep_path, rep)
+
+        store = self._rep_stores.get(rep)
+        if store is None or store.path != rep_path:
+            store = io_tools.open_embedding_store(rep_path)
+            self._rep_stores[rep] = store
+        else:
+            store.refresh()
+
+        return store
+
+    def _set_proteins(self):
+        """
+        Fills missing columns and creates the lazy protein list from the columns.
+        """
+        for column in ["y", "y_pred", "y_sigma", "acq_score"]:
+            if getattr(self, column) is None:
+                setattr(self, column, [None] * len(self.seqs))
+            else:
+                # records write to the columns
+                setattr(self, column, list(getattr(self, column)))
+
+        self.proteins = LazyProteinList(self)
+
+    def _make_protein(self, index: int):
+        """
+        Creates the LibraryRecord for row index of the library columns.
+        """
+        protein = LibraryRecord(self, index)
+        protein.reps = [
+            rep
+            for rep in self.reps
+            if rep in self._rep_stores and protein.name in self._rep_stores[rep]
+        ]
+        return protein
 
     def _check_strucs(self):
         """
@@ -507,11 +631,11 @@ class Library:
                 f"Number of provided names ({len(new_names)}) does not match number of proteins in the library ({len(self.proteins)})."
             )
 
-        # Update names of Protein objects and in the self.names list
-        for protein, new_name in zip(self.proteins, new_names):
-            protein.name = new_name
+        # Update names of created protein records and in the self.names list
+        for i, protein in self.proteins.materialized().items():
+            protein.name = new_names[i]
 
-        self.names = new_names
+        self.names = list(new_names)
 
         self._check_reps()
         self._check_strucs()
@@ -529,8 +653,7 @@ class Library:
                 f"Number of provided y values ({len(y_values)}) does not match number of proteins in the library ({len(self.proteins)})."
             )
 
-        for protein, y_value in zip(self.proteins, y_values):
-            protein.y = y_value
+        self.y = list(y_values)
 
     ### Representation builders ###
     def compute(
@@ -541,6 +664,10 @@ class Library:
         pbar=None,
         device=None,
         proteins=None,
+        max_tokens_per_batch: Union[int, None] = None,
+        storage_dtype: str = "float32",
+        n_workers: Union[int, None] = None,
+        threads_per_worker: Union[int, None] = None,
     ):
         """
         Compute representations for proteins.
@@ -553,8 +680,15 @@ class Library:
             device (str): Choose hardware for computation. Default 'None' for autoselection
                           other options are 'cpu' and 'cuda'.
             proteins (list): list of specific proteins. Optional
+            max_tokens_per_batch (int): Batch esm computations by sequence length under a
+                token budget instead of using batch_size. Default None.
+            storage_dtype (str): Storage dtype of new esm representation stores, 'float32',
+                'float16', 'bfloat16' or 'int8'. Default 'float32'.
+            n_workers (int): Number of cpu worker processes for esm computations. Default None.
+            threads_per_worker (int): Intra-op threads per worker. Default None (cpu count
+                divided by n_workers).
         """
-        simple_rep_types = ["ohe", "blosum62", "blosum50"]
+        simple_rep_types = ["ohe", "ohe_sparse", "blosum62", "blosum50"]
         supported_methods = self.representation_types + simple_rep_types
 
         assert method in supported_methods, f"'{method}' is not a supported method"
@@ -562,11 +696,24 @@ class Library:
 
         if method in ["esm2", "esm1v"]:
             self.esm_builder(
-                model=method, batch_size=batch_size, dest=dest, pbar=pbar, device=device
+                model=method,
+                batch_size=batch_size,
+                dest=dest,
+                pbar=pbar,
+                device=device,
+                max_tokens_per_batch=max_tokens_per_batch,
+                storage_dtype=storage_dtype,
+                n_workers=n_workers,
+                threads_per_worker=threads_per_worker,
             )
         elif method == "ohe":
             reps = self.ohe_builder(dest=dest, pbar=pbar, proteins=proteins)
             return reps
+        elif method == "ohe_sparse":
+            reps = self.ohe_builder(
+                dest=dest, pbar=pbar, proteins=proteins, sparse=True
+            )
+            return reps
         elif method in ["blosum62", "blosum50"]:
             reps = self.blosum_builder(
                 matrix_type=method.upper(), dest=dest, pbar=pbar, proteins=proteins
@@ -580,6 +727,10 @@ class Library:
         dest: Union[str, None] = None,
         pbar=None,
         device=None,
+        max_tokens_per_batch: Union[int, None] = None,
+        storage_dtype: str = "float32",
+        n_workers: Union[int, None] = None,
+        threads_per_worker: Union[int, None] = None,
     ):
         """
         Computes esm representations.
@@ -591,6 +742,11 @@ class Library:
             pbar: Progress bar for shiny app.
             device (str): Choose hardware for computation. Default 'None' for autoselection
                           other options are 'cpu' and 'cuda'.
+            max_tokens_per_batch (int): Sort sequences by length and pack batches of at most
+                max_tokens_per_batch padded tokens. Default None (batches of batch_size).
+            storage_dtype (str): Storage dtype of a new representation store. Default 'float32'.
+            n_workers (int): Number of cpu worker processes sharing the model. Default None.
+            threads_per_worker (int): Intra-op threads per worker. Default None.
         """
 
         dest = os.path.join(self.rep_path, model)
@@ -598,24 +754,26 @@ class Library:
         if not os.path.exists(dest):
             os.makedirs(dest)
 
-        # Filtering out proteins that have already computed representations
-        proteins_to_compute = [
-            protein
-            for protein in self.proteins
-            if not os.path.exists(os.path.join(dest, protein.name + ".pt"))
-        ]
+        # Filtering out proteins that have already computed representations of
+        # the same sequence, entries whose sequence changed are recomputed
+        store = self._get_store(model)
+        to_compute = []
+        for i, (name, seq) in enumerate(zip(self.names, self.seqs)):
+            key = io_tools.sequence_hash(seq)
+            if name not in store or store.keys.get(name, key) != key:
+                to_compute.append(i)
 
-        print(f"computing {len(proteins_to_compute)} proteins")
+        print(f"computing {len(to_compute)} proteins")
 
         if pbar:
             pbar.set(
-                message=f"Computing {len(proteins_to_compute)} representations",
+                message=f"Computing {len(to_compute)} representations",
                 detail="...",
             )
 
         # get names for and sequences for computation
-        names = [protein.name for protein in proteins_to_compute]
-        seqs = [protein.seq for protein in proteins_to_compute]
+        names = [self.names[i] for i in to_compute]
+        seqs = [self.seqs[i] for i in to_compute]
 
         # compute representations
         esm_tools.batch_compute(
@@ -626,22 +784,35 @@ class Library:
             batch_size=batch_size,
             pbar=pbar,
             device=device,
+            max_tokens_per_batch=max_tokens_per_batch,
+            storage_dtype=storage_dtype,
+            n_workers=n_workers,
+            threads_per_worker=threads_per_worker,
         )
 
-        for protein in proteins_to_compute:
-            if model not in protein.reps:
-                protein.reps.append(model)
+        store.refresh()
+        for protein in self.proteins.materialized().values():
+            if protein.name in store:
+                protein.add_rep(model)
 
         if model not in self.reps:
             self.reps.append(model)
 
-    def ohe_builder(self, dest: Union[str, None] = None, pbar=None, proteins=None):
+    def ohe_builder(
+        self,
+        dest: Union[str, None] = None,
+        pbar=None,
+        proteins=None,
+        sparse: bool = False,
+    ):
         """
         Computes one-hot encoding representations for proteins using one_hot_encoder method.
         Assumes all data fits in memory.
 
         Args:
             dest (str): destination of representations
+            sparse (bool): return a scipy CSR matrix with one flattened row per protein
+                instead of a dense tensor. Default False.
         """
         if proteins:
             seqs = [prot.seq for prot in proteins]
@@ -649,7 +820,12 @@ class Library:
             seqs = self.seqs
 
         # Determine the maximum sequence length for padding
-        max_sequence_length = max(len(seq) for seq in self.seqs)
+        max_sequence_length = self._padding_length()
+
+        if sparse:
+            return torch_tools.sparse_one_hot_encoder(
+                seqs, pbar=pbar, padding=max_sequence_length
+            )
 
         # Compute the one-hot encoding with the calculated padding
         ohe_representations = torch_tools.one_hot_encoder(
@@ -679,7 +855,7 @@ class Library:
             seqs = self.seqs
 
         # Determine the maximum sequence length for padding
-        max_sequence_length = max(len(seq) for seq in self.seqs)
+        max_sequence_length = self._padding_length()
 
         # Compute the BLOSUM encoding with the calculated padding
         blosum_representations = torch_tools.blosum_encoding(
@@ -699,25 +875,159 @@ class Library:
             proteins (list): list of proteins to load, load all if None
 
         Returns:
-            list: List of representations.
+            torch.Tensor: Representations, one row per protein.
         """
 
-        if self.rep_path is None:
-            rep_path = os.path.join(self.user, f"rep/{rep}")
-        else:
-            rep_path = os.path.join(self.rep_path, rep)
-
         if proteins is None:
-            file_names = [protein.name + ".pt" for protein in self.proteins]
+            proteins = self.proteins
+
+        if rep in self.in_memory:
+            reps = self._cached_representations(rep, proteins)
         else:
-            file_names = [protein.name + ".pt" for protein in proteins]
+            store = self._get_store(rep)
+            reps = store.get([protein.name for protein in proteins])
+        return reps
+
+    def compress_representations(
+        self,
+        rep: str,
+        dtype: Union[str, None] = None,
+        n_components: Union[int, None] = None,
+        method: str = "pca",
+        sample_size: int = 10000,
+        seed: Union[int, None] = None,
+    ):
+        """
+        Reduces the storage precision and/or the dimensionality of stored representations.
+        The projection is fitted on (a sample of) the library, saved in the representation
+        directory and applied whenever the representations are loaded. Models trained
+        before the projection changed have to be retrained.
+
+        Args:
+            rep (str): stored representation type, e.g. 'esm2'.
+            dtype (str): New storage dtype, 'float32', 'float16', 'bfloat16' or 'int8'.
+                Default None keeps the dtype.
+            n_components (int): Number of dimensions to project to. Default None keeps
+                the current projection, 0 removes it.
+            method (str): 'pca' or 'random' projection. Default 'pca'.
+            sample_size (int): Maximum number of representations the projection is fitted on.
+            seed (int): Random seed for sampling and random projections. Default None.
 
+        Returns:
+            EmbeddingStore: the store of the representation type.
+        """
         if rep in self.in_memory:
-            reps = self.compute(method=rep, proteins=proteins)
+            raise ValueError(f"'{rep}' representations are not stored")
+
+        store = self._get_store(rep)
+        if dtype is not None:
+            store.convert(dtype)
+
+        if n_components == 0:
+            store.set_projection(None)
+        elif n_components is not None:
+            names = [name for name in self.names if name in store]
+            if len(names) > sample_size:
+                generator = torch.Generator()
+                if seed is not None:
+                    generator.manual_seed(seed)
+                idx = torch.randperm(len(names), generator=generator)[:sample_size]
+                names = [names[i] for i in sorted(idx.tolist())]
+            x = store.get(names, project=False)
+            projection = io_tools.EmbeddingProjection.fit(
+                x, n_components=n_components, method=method, seed=seed
+            )
+            store.set_projection(projection)
+
+        return store
+
+    def _padding_length(self):
+        """
+        Length of the longest sequence, to which in-memory representations are
+        padded. It is computed once per set of sequences, for lazily built mutant
+        sequences from the wildtype without building them.
+        """
+        if self._padding is None or self._padding[0] is not self.seqs:
+            if isinstance(self.seqs, esm_tools.MutantSequences):
+                length = len(self.seqs.wt_seq)
+            else:
+                length = max(len(seq) for seq in self.seqs)
+            self._padding = (self.seqs, length)
+
+        return self._padding[1]
+
+    def _cached_representations(self, rep: str, proteins: list):
+        """
+        Returns in-memory representations for proteins, encoding only sequences
+        that are not cached yet. Entries are keyed by representation type and
+        padding length, rows by sequence, so changed sequences are re-encoded.
+
+        Args:
+            rep (str): in-memory representation type
+            proteins (list): list of proteins
+
+        Returns:
+            torch.Tensor: representations in the order of proteins.
+        """
+        padding = self._padding_length()
+        key = (rep, padding)
+
+        entry = self._rep_cache.pop(key, {"index": {}, "data": None})
+        self._rep_cache[key] = entry  # most recently used entries at the end
+        index = entry["index"]
+
+        seqs = [protein.seq for protein in proteins]
+        missing = list(dict.fromkeys(seq for seq in seqs if seq not in index))
+        if missing:
+            if rep == "ohe":
+                new_reps = torch_tools.one_hot_encoder(missing, padding=padding)
+            elif rep == "ohe_sparse":
+                new_reps = torch_tools.sparse_one_hot_encoder(missing, padding=padding)
+            else:
+                new_reps = torch_tools.blosum_encoding(
+                    missing, matrix=rep.upper(), padding=padding
+                )
+            offset = 0 if entry["data"] is None else entry["data"].shape[0]
+            for i, seq in enumerate(missing):
+                index[seq] = offset + i
+            if entry["data"] is None:
+                entry["data"] = new_reps
+            elif sp.issparse(new_reps):
+                entry["data"] = sp.vstack([entry["data"], new_reps], format="csr")
+            else:
+                entry["data"] = torch.cat([entry["data"], new_reps])
+
+        rows = [index[seq] for seq in seqs]
+        if sp.issparse(entry["data"]):
+            reps = entry["data"][rows]
         else:
-            _, reps = io_tools.load_embeddings(path=rep_path, names=file_names)
+            reps = entry["data"][torch.tensor(rows, dtype=torch.long)]
+
+        self._evict_rep_cache()
+
         return reps
 
+    def _evict_rep_cache(self):
+        """
+        Drops least recently used cache entries above max_rep_cache_memory.
+        """
+
+        def nbytes(data):
+            if sp.issparse(data):
+                return data.data.nbytes + data.indices.nbytes + data.indptr.nbytes
+            return data.element_size() * data.nelement()
+
+        memory = sum(nbytes(e["data"]) for e in self._rep_cache.values())
+        while self._rep_cache and memory > self.max_rep_cache_memory:
+            _, entry = self._rep_cache.popitem(last=False)
+            memory -= nbytes(entry["data"])
+
+    def clear_rep_cache(self):
+        """
+        Clears cached in-memory representations.
+        """
+        self._rep_cache.clear()
+
     ### Folding ###
     def fold(
         self,
@@ -738,7 +1048,8 @@ class Library:
         """
         out = False
 
-        seqs = self.data[self.data[self.names_col].isin(names)][self.seq_col].to_list()
+        selected = set(names)
+        seqs = [seq for name, seq in zip(self.names, self.seqs) if name in selected]
         if len(seqs) > 0:
             all_headers, all_sequences, all_pdbs, pTMs, mean_pLDDTs = (
                 esm_tools.structure_prediction(
@@ -879,6 +1190,8 @@ class Library:
         """
 
         x = self.load_representations(rep)
+        if sp.issparse(x):
+            x = x.toarray()
         y = self.y
 
         if self.y_type == "class":
@@ -921,6 +1234,8 @@ class Library:
         """
 
         x = self.load_representations(rep)
+        if sp.issparse(x):
+            x = x.toarray()
         y = self.y
 
         if self.y_type == "class":
@@ -963,6 +1278,8 @@ class Library:
         """
 
         x = self.load_representations(rep)
+        if sp.issparse(x):
+            x = x.toarray()
         y = self.y
 
         if self.y_type == "class":
@@ -15,10 +15,18 @@ import torch
 import pandas as pd
 import gpytorch
 import numpy as np
-from joblib import dump
+import scipy.sparse as sp
+from joblib import dump, Parallel, delayed
 from typing import Union
 from proteusAI.Library import Library
-from proteusAI.ml_tools.torch_tools import GP, predict_gp, computeR2
+from proteusAI.ml_tools.torch_tools import (
+    GP,
+    SparseGP,
+    predict_gp,
+    predict_gp_joint,
+    computeR2,
+    sparse_to_codes,
+)
 from sklearn.linear_model import Ridge, RidgeClassifier
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.svm import SVC, SVR
@@ -30,6 +38,17 @@ root_path = os.path.join(current_path, "..")
 sys.path.append(root_path)
 
 
+def _fit_fold(model, x, y, train_index, test_index):
+    """
+    Fits a model on one cross validation fold and returns the fitted model and
+    its R-squared value on the held out part of the fold.
+    """
+    model.fit(x[train_index], y[train_index])
+    test_r2 = model.score(x[test_index], y[test_index])
+
+    return model, test_r2
+
+
 class Model:
     """
     The Model object allows the user to create machine learning models, using
@@ -48,6 +67,9 @@ class Model:
         optim (str): Optimizer for training PyTorch models. Default 'adam'.
         lr (float): Learning rate for training PyTorch models. Default 10e-4.
         seed (int): random seed. Default 21.
+        num_inducing (int): Number of inducing points of sparse GPs ('sgp'). Default 500.
+        gp_batch_size (int): Minibatch size for training sparse GPs. Default 1024.
+        n_jobs (int): Number of parallel jobs for k-fold ensembles. Default 1.
         test_true (list): List of true values of the test dataset.
         test_predictions (list): Predicted values of the test dataset.
         test_r2 (float): R-squared value of the model on the test set.
@@ -57,8 +79,8 @@ class Model:
     """
 
     _sklearn_models = ["rf", "knn", "svm", "ffnn", "ridge"]
-    _pt_models = ["gp"]
-    _in_memory_representations = ["ohe", "blosum50", "blosum62"]
+    _pt_models = ["gp", "sgp"]
+    _in_memory_representations = ["ohe", "ohe_sparse", "blosum50", "blosum62"]
 
     def __init__(self, **kwargs):
         """
@@ -77,6 +99,9 @@ class Model:
             optim (str): Optimizer for training PyTorch models. Default 'adam'.
             lr (float): Learning rate for training PyTorch models. Default 10e-4.
             seed (int): random seed. Default 21.
+            num_inducing (int): Number of inducing points of sparse GPs ('sgp'). Default 500.
+            gp_batch_size (int): Minibatch size for training sparse GPs. Default 1024.
+            n_jobs (int): Number of parallel jobs to fit k-fold ensembles and predict with them, -1 uses all cores. Default 1.
         """
         self._model = None
         self.train_data = []
@@ -117,6 +142,9 @@ class Model:
             "seed": None,
             "dest": None,
             "pbar": None,
+            "num_inducing": 500,
+            "gp_batch_size": 1024,
+            "n_jobs": 1,
         }
 
         # Update defaults with provided keyword arguments
@@ -141,6 +169,9 @@ class Model:
             "seed": None,
             "dest": None,
             "pbar": None,
+            "num_inducing": 500,
+            "gp_batch_size": 1024,
+            "n_jobs": 1,
         }
 
         # Update defaults with provided keyword arguments
@@ -155,8 +186,8 @@ class Model:
 
         Args:
             library (proteusAI.Library): Data for training.
-            model_type (str): choose the model type ['rf', 'svm', 'knn', 'ffnn'],
-            x (str): choose the representation type ['esm2', 'esm1v', 'ohe', 'blosum50', 'blosum62'].
+            model_type (str): choose the model type ['rf', 'svm', 'knn', 'ffnn', 'ridge', 'gp', 'sgp'],
+            x (str): choose the representation type ['esm2', 'esm1v', 'ohe', 'ohe_sparse', 'blosum50', 'blosum62'].
             rep_path (str): Path to representations. Default None - will extract from library object.
             split (tuple or dict): Choose the split ratio of training, testing and validation data as a tuple. Default (80,10,10).
                                    Alternatively, provide a dictionary of proteins, with the keys 'train', 'test', and 'val', with
@@ -207,7 +238,8 @@ class Model:
             tuple: returns three lists of train, test and validation proteins.
         """
 
-        proteins = self.library.proteins
+        # shuffle a copy, the library keeps its order
+        proteins = list(self.library.proteins)
 
         if self.seed:
             random.seed(self.seed)
@@ -260,6 +292,41 @@ class Model:
 
         return reps
 
+    def _stack_reps(self, reps):
+        """
+        Stacks representations into a 2D tensor with one flattened row per protein.
+
+        Args:
+            reps (list or torch.Tensor): list of representations or stacked tensor.
+
+        Returns:
+            torch.Tensor: 2D tensor of representations.
+        """
+        if not isinstance(reps, torch.Tensor):
+            reps = torch.stack(list(reps))
+
+        return reps.reshape(len(reps), -1)
+
+    def _sklearn_input(self, reps):
+        """
+        Returns representations as input for sklearn models. Sparse representations
+        are passed on as CSR matrix, all others as 2D numpy array.
+        """
+        if sp.issparse(reps):
+            return sp.csr_matrix(reps)
+
+        return self._stack_reps(reps).cpu().numpy()
+
+    def _gp_input(self, reps):
+        """
+        Returns representations as input for GP models. Sparse one-hot
+        representations are converted to integer codes for the Hamming kernel.
+        """
+        if sp.issparse(reps):
+            return sparse_to_codes(reps).to(device=self.device)
+
+        return self._stack_reps(reps).to(device=self.device)
+
     def model(self, **kwargs):
         """
         Load or create model according to user specifications and parameters.
@@ -312,12 +379,12 @@ class Model:
 
         elif model_type in self._pt_models:
             if self.y_type == "class":
-                if model_type == "gp":
+                if model_type in ["gp", "sgp"]:
                     raise ValueError(
                         f"Model type '{model_type}' has not been implemented yet"
                     )
             elif self.y_type == "num":
-                if model_type == "gp":
+                if model_type in ["gp", "sgp"]:
                     model = "GP_MODEL"
 
             return model
@@ -342,15 +409,9 @@ class Model:
         test = self.load_representations(self.test_data, rep_path=rep_path)
         val = self.load_representations(self.val_data, rep_path=rep_path)
 
-        # handle representations that are not esm
-        if len(train[0].shape) == 2:
-            train = [x.view(-1) for x in train]
-            test = [x.view(-1) for x in test]
-            val = [x.view(-1) for x in val]
-
-        x_train = torch.stack(train).cpu().numpy()
-        x_test = torch.stack(test).cpu().numpy()
-        x_val = torch.stack(val).cpu().numpy()
+        x_train = self._sklearn_input(train)
+        x_test = self._sklearn_input(test)
+        x_val = self._sklearn_input(val)
 
         # TODO: For representations that are stored in memory the computation happens here:
         if self.library.pred_data:
@@ -400,7 +461,7 @@ class Model:
             dump(self._model, model_save_path)
 
             # Add predictions to test proteins
-            for i in range(len(test)):
+            for i in range(len(self.test_data)):
                 self.test_data[i].y_pred = self.y_test_pred[i]
                 self.test_data[i].y_sigma = self.y_test_sigma[i]
 
@@ -452,29 +513,24 @@ class Model:
 
             kf = KFold(n_splits=self.k_folds, shuffle=True, random_state=self.seed)
             self.y_train = self.y_train + self.y_test
-            fold_results = []
-            ensemble = []
-
-            for i, data in enumerate(kf.split(x_train)):
-                train_index, test_index = data
-
-                if pbar:
-                    pbar.set(
-                        message=f"Training {self.model_type} {i+1}/{self.k_folds}",
-                        detail="...",
-                    )
+            y_train = np.array(self.y_train)
 
-                x_train_fold, x_test_fold = x_train[train_index], x_train[test_index]
-                y_train_fold, y_test_fold = (
-                    np.array(self.y_train)[train_index],
-                    np.array(self.y_train)[test_index],
+            if pbar:
+                pbar.set(
+                    message=f"Training {self.k_folds} {self.model_type} models",
+                    detail="...",
                 )
 
-                self._model = self.model()
-                self._model.fit(x_train_fold, y_train_fold)
-                test_r2 = self._model.score(x_test_fold, y_test_fold)
-                fold_results.append(test_r2)
-                ensemble.append(self._model)
+            # folds are fitted in worker processes, which memory map x_train
+            # instead of receiving a copy per fold
+            fits = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_fold)(
+                    self.model(), x_train, y_train, train_index, test_index
+                )
+                for train_index, test_index in kf.split(x_train)
+            )
+            ensemble = [model for model, _ in fits]
+            fold_results = [test_r2 for _, test_r2 in fits]
 
             avg_test_r2 = np.mean(fold_results)
 
@@ -545,12 +601,12 @@ class Model:
             self.y_best = max((max(self.y_train), max(self.y_val)))
 
         # Add predictions to proteins
-        for i in range(len(train)):
+        for i in range(len(self.train_data)):
             self.train_data[i].y_pred = self.y_train_pred[i]
             self.train_data[i].y_sigma = self.y_train_sigma[i]
 
         # Add predictions to test proteins
-        for i in range(len(val)):
+        for i in range(len(self.val_data)):
             self.val_data[i].y_pred = self.y_val_pred[i]
             self.val_data[i].y_sigma = self.y_val_sigma[i]
 
@@ -599,15 +655,9 @@ class Model:
         test = self.load_representations(self.test_data, rep_path=rep_path)
         val = self.load_representations(self.val_data, rep_path=rep_path)
 
-        # handle representations that are not esm
-        if len(train[0].shape) == 2:
-            train = [x.view(-1) for x in train]
-            test = [x.view(-1) for x in test]
-            val = [x.view(-1) for x in val]
-
-        x_train = torch.stack(train).to(device=self.device)
-        x_test = torch.stack(test).to(device=self.device)
-        x_val = torch.stack(val).to(device=self.device)
+        x_train = self._gp_input(train)
+        x_test = self._gp_input(test)
+        x_val = self._gp_input(val)
 
         if self.library.pred_data:
             self.y_train = (
@@ -653,40 +703,17 @@ class Model:
         self.likelihood = gpytorch.likelihoods.GaussianLikelihood().to(
             device=self.device
         )
-        self._model = GP(x_train, self.y_train, self.likelihood).to(device=self.device)
-        # fix_mean = True
-
-        optimizer = torch.optim.Adam(self._model.parameters(), lr=initial_lr)
-        scheduler = torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=decay_rate)
-        mll = gpytorch.mlls.ExactMarginalLogLikelihood(self.likelihood, self._model)
-
-        # for param in self._model.named_parameters():
-        #    print(param)
-
-        # model.mean_module.constant.data.fill_(1)  # FIX mean to 1
-        self._model.train()
-        self.likelihood.train()
-        prev_loss = float("inf")
+        kernel = "hamming" if self.x == "ohe_sparse" else "rbf"
 
         if pbar:
             pbar.set(message=f"Training {self.model_type}", detail="...")
 
-        for _ in range(epochs):
-            optimizer.zero_grad()
-            output = self._model(x_train)
-            loss = -mll(output, self.y_train)
-            loss.backward()
-            optimizer.step()
-            scheduler.step()
-
-            # Check for convergence
-            if abs(prev_loss - loss.item()) < 0.0001:
-                #    print(f'Convergence reached. Stopping training...')
-                break
-
-            prev_loss = loss.item()
+        if self.model_type == "sgp":
+            loss = self._fit_sparse_gp(x_train, kernel, epochs, initial_lr, final_lr)
+        else:
+            loss = self._fit_exact_gp(x_train, kernel, epochs, initial_lr, decay_rate)
 
-        print(f"Training completed. Final loss: {loss.item()}")
+        print(f"Training completed. Final loss: {loss}")
 
         # prediction on train set
         y_train_pred, y_train_sigma = predict_gp(self._model, self.likelihood, x_train)
@@ -722,17 +749,17 @@ class Model:
         self.y_best = max((max(self.y_train), max(self.y_test), max(self.y_val)))
 
         # Add predictions to proteins
-        for i in range(len(train)):
+        for i in range(len(self.train_data)):
             self.train_data[i].y_pred = self.y_train_pred[i].item()
             self.train_data[i].y_sigma = self.y_train_sigma[i].item()
 
         # Add predictions to test proteins
-        for i in range(len(test)):
+        for i in range(len(self.test_data)):
             self.test_data[i].y_pred = self.y_test_pred[i].item()
             self.test_data[i].y_sigma = self.y_test_sigma[i].item()
 
         # Add predictions to test proteins
-        for i in range(len(val)):
+        for i in range(len(self.val_data)):
             self.val_data[i].y_pred = self.y_val_pred[i].item()
             self.val_data[i].y_pred = self.y_val_sigma[i].item()
 
@@ -811,6 +838,208 @@ class Model:
 
         return out
 
+    def update(self, new_proteins: list, rep_path=None, steps=None, lr=0.01):
+        """
+        Adds newly assayed proteins to a trained GP without retraining from scratch.
+        Exact GPs are conditioned on the new observations by a low-rank update of
+        the cached posterior solve (fantasy model), keeping the hyperparameters.
+        Sparse GPs run a few warm-started ELBO epochs on all training data. The
+        test and validation statistics of the last full training are kept.
+
+        Args:
+            new_proteins (list): List of proteins with measured y values.
+            rep_path (str): Path to representations for the new proteins.
+            steps (int): Warm-started optimization steps after conditioning. Default
+                None - 0 for 'gp', 10 epochs for 'sgp'.
+            lr (float): Learning rate of the warm-started steps. Default 0.01.
+
+        Example:
+            model.train(library=lib, x='esm2', model_type='gp')
+            model.update(assayed_proteins)
+            ranked, y_pred, y_sigma, _, acq_score = model.predict(search_space, acq_fn='ei')
+        """
+        if self._model is None:
+            raise ValueError("Model is 'None', train the model before updating it")
+
+        if self.model_type not in self._pt_models:
+            raise ValueError(
+                f"Incremental updates are only supported for {self._pt_models} models, retrain '{self.model_type}' models instead"
+            )
+
+        if len(new_proteins) == 0:
+            return
+
+        if steps is None:
+            steps = 10 if self.model_type == "sgp" else 0
+
+        new_reps = self.load_representations(new_proteins, rep_path=rep_path)
+        x_new = self._gp_input(new_reps)
+        if self.library.pred_data:
+            y_new = [protein.y_pred for protein in new_proteins]
+        else:
+            y_new = [protein.y for protein in new_proteins]
+        y_new = torch.tensor(y_new, dtype=torch.float32, device=self.device)
+
+        if self.model_type == "sgp":
+            train = self.load_representations(self.train_data, rep_path=rep_path)
+            x = torch.cat([self._gp_input(train), x_new])
+            y = torch.cat(
+                [torch.as_tensor(self.y_train, device=self.device).float(), y_new]
+            )
+            generator = torch.Generator()
+            if self.seed:
+                generator.manual_seed(self.seed)
+
+            optimizer = torch.optim.Adam(
+                [
+                    {"params": self._model.parameters()},
+                    {"params": self.likelihood.parameters()},
+                ],
+                lr=lr,
+            )
+            self._optimize_sparse_gp(x, y, optimizer, None, steps, generator)
+        else:
+            # the fantasy update needs the cached solve of a previous prediction
+            if self._model.prediction_strategy is None:
+                predict_gp(self._model, self.likelihood, x_new)
+
+            self._model.eval()
+            self._model = self._model.get_fantasy_model(x_new, y_new)
+            self.likelihood = self._model.likelihood
+
+            if steps > 0:
+                x, y = self._model.train_inputs[0], self._model.train_targets
+                optimizer = torch.optim.Adam(self._model.parameters(), lr=lr)
+                mll = gpytorch.mlls.ExactMarginalLogLikelihood(
+                    self.likelihood, self._model
+                )
+                self._model.train()
+                self.likelihood.train()
+                for _ in range(steps):
+                    optimizer.zero_grad()
+                    loss = -mll(self._model(x), y)
+                    loss.backward()
+                    optimizer.step()
+
+        # predictions for the new training proteins
+        y_pred, y_sigma = predict_gp(self._model, self.likelihood, x_new)
+        y_pred, y_sigma = y_pred.cpu().numpy(), y_sigma.cpu().numpy()
+        for i, protein in enumerate(new_proteins):
+            protein.y_pred = y_pred[i].item()
+            protein.y_sigma = y_sigma[i].item()
+
+        y_new = y_new.cpu().numpy()
+        self.train_data = self.train_data + list(new_proteins)
+        self.y_train = np.concatenate([np.asarray(self.y_train), y_new])
+        self.y_train_pred = np.concatenate([self.y_train_pred, y_pred])
+        self.y_train_sigma = np.concatenate([self.y_train_sigma, y_sigma])
+        self.y_best = max(self.y_best, y_new.max())
+
+    def _fit_exact_gp(self, x_train, kernel, epochs, initial_lr, decay_rate):
+        """
+        Fits an exact GP on all training data. Returns the final loss.
+        """
+        self._model = GP(x_train, self.y_train, self.likelihood, kernel=kernel).to(
+            device=self.device
+        )
+        # fix_mean = True
+
+        optimizer = torch.optim.Adam(self._model.parameters(), lr=initial_lr)
+        scheduler = torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=decay_rate)
+        mll = gpytorch.mlls.ExactMarginalLogLikelihood(self.likelihood, self._model)
+
+        # for param in self._model.named_parameters():
+        #    print(param)
+
+        # model.mean_module.constant.data.fill_(1)  # FIX mean to 1
+        self._model.train()
+        self.likelihood.train()
+        prev_loss = float("inf")
+
+        for _ in range(epochs):
+            optimizer.zero_grad()
+            output = self._model(x_train)
+            loss = -mll(output, self.y_train)
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+
+            # Check for convergence
+            if abs(prev_loss - loss.item()) < 0.0001:
+                #    print(f'Convergence reached. Stopping training...')
+                break
+
+            prev_loss = loss.item()
+
+        return loss.item()
+
+    def _fit_sparse_gp(self, x_train, kernel, epochs, initial_lr, final_lr):
+        """
+        Fits a variational GP on num_inducing inducing points, initialized from a
+        random subset of the training data, on minibatches of gp_batch_size. The
+        learning rate decays from initial_lr to final_lr over the epochs. Returns
+        the final loss.
+        """
+        n = len(x_train)
+        generator = torch.Generator()
+        if self.seed:
+            generator.manual_seed(self.seed)
+
+        inducing = torch.randperm(n, generator=generator)[: self.num_inducing]
+        inducing_points = x_train[inducing.to(x_train.device)].clone()
+        self._model = SparseGP(inducing_points, kernel=kernel).to(device=self.device)
+
+        optimizer = torch.optim.Adam(
+            [
+                {"params": self._model.parameters()},
+                {"params": self.likelihood.parameters()},
+            ],
+            lr=initial_lr,
+        )
+        gamma = (final_lr / initial_lr) ** (1 / max(epochs, 1))
+        scheduler = torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=gamma)
+
+        return self._optimize_sparse_gp(
+            x_train, self.y_train, optimizer, scheduler, epochs, generator
+        )
+
+    def _optimize_sparse_gp(self, x, y, optimizer, scheduler, epochs, generator):
+        """
+        Runs minibatch ELBO epochs of a sparse GP on x and y. Returns the final
+        loss.
+        """
+        n = len(x)
+        mll = gpytorch.mlls.VariationalELBO(self.likelihood, self._model, num_data=n)
+
+        self._model.train()
+        self.likelihood.train()
+        prev_loss = float("inf")
+        epoch_loss = float("inf")
+
+        for _ in range(epochs):
+            epoch_loss = 0.0
+            for batch in torch.randperm(n, generator=generator).split(
+                self.gp_batch_size
+            ):
+                batch = batch.to(x.device)
+                optimizer.zero_grad()
+                output = self._model(x[batch])
+                loss = -mll(output, y[batch])
+                loss.backward()
+                optimizer.step()
+                epoch_loss += loss.item() * len(batch)
+            if scheduler is not None:
+                scheduler.step()
+
+            # Check for convergence
+            epoch_loss /= n
+            if abs(prev_loss - epoch_loss) < 0.0001:
+                break
+
+            prev_loss = epoch_loss
+
+        return epoch_loss
+
     # Save the sequences, y-values, and predicted y-values to CSV
     def save_to_csv(
         self,
@@ -877,7 +1106,14 @@ class Model:
 
         return df
 
-    def predict(self, proteins: list, rep_path=None, acq_fn="greedy", batch_size=10000):
+    def predict(
+        self,
+        proteins: list,
+        rep_path=None,
+        acq_fn="greedy",
+        batch_size=10000,
+        top_k=None,
+    ):
         """
         Scores the R-squared value for a list of proteins.
 
@@ -886,85 +1122,196 @@ class Model:
             rep_path (str): Path to representations for proteins in the list.
                 If None, the library project path and representation type for training
                 will be assumed
+            acq_fn (str): Acquisition function, 'greedy', 'ei', 'ucb' or 'random'.
+            batch_size (int): Number of proteins loaded and predicted at once.
+            top_k (int): Only return the top_k proteins by acquisition score. Default
+                None returns all proteins ranked.
 
         Returns:
             list: Predictions generated by the model.
         """
-        if self._model is None:
-            raise ValueError("Model is 'None'")
+        acq = self._acq_fn(acq_fn)
+
+        # predictions are written into arrays for the whole candidate set
+        n = len(proteins)
+        all_y_pred = np.empty(n, dtype=np.float32)
+        all_sigma_pred = np.empty(n, dtype=np.float32)
+
+        for start, _, y_pred, sigma_pred in self._predict_batches(
+            proteins, rep_path=rep_path, batch_size=batch_size
+        ):
+            if start == 0:
+                dtype = np.result_type(y_pred, np.float32)
+                all_y_pred = all_y_pred.astype(dtype, copy=False)
+                all_sigma_pred = all_sigma_pred.astype(dtype, copy=False)
 
-        if acq_fn == "ei":
-            acq = BO.EI
-        elif acq_fn == "greedy":
-            acq = BO.greedy
-        elif acq_fn == "ucb":
-            acq = BO.UCB
-        elif acq_fn == "random":
-            acq = BO.random_acquisition
+            all_y_pred[start : start + len(y_pred)] = y_pred
+            all_sigma_pred[start : start + len(y_pred)] = sigma_pred
 
-        all_y_pred = []
-        all_sigma_pred = []
-        all_acq_scores = []
+        all_acq_scores = np.empty_like(all_y_pred)
+        acq(all_y_pred, all_sigma_pred, self.y_best, out=all_acq_scores)
+
+        # Indices of the best acquisition scores, only the top_k are sorted
+        sorted_indices = BO.top_k(all_acq_scores, n if top_k is None else top_k)
+
+        # Sort all lists/arrays by the sorted indices
+        val_data = [proteins[i] for i in sorted_indices]
+        y_val = [prot.y for prot in val_data]
+        y_val_pred = all_y_pred[sorted_indices]
+        y_val_sigma = all_sigma_pred[sorted_indices]
+        sorted_acq_score = all_acq_scores[sorted_indices]
+
+        for prot, y_pred, y_sigma in zip(val_data, y_val_pred, y_val_sigma):
+            prot.y_pred = y_pred
+            prot.y_sigma = y_sigma
+
+        return val_data, y_val_pred, y_val_sigma, y_val, sorted_acq_score
+
+    def predict_stream(
+        self, proteins: list, rep_path=None, acq_fn="greedy", batch_size=10000
+    ):
+        """
+        Yields predictions batch by batch, in the order of proteins and without
+        updating the proteins. Representations are loaded per batch, GP models
+        reuse their cached posterior solve across batches.
+
+        Args:
+            proteins (list): List of proteins to make predictions.
+            rep_path (str): Path to representations for proteins in the list.
+            acq_fn (str): Acquisition function, 'greedy', 'ei', 'ucb' or 'random'.
+            batch_size (int): Number of proteins loaded and predicted at once.
+
+        Returns:
+            generator: tuples of batch proteins, predictions, standard deviations
+                and acquisition scores (numpy arrays).
+
+        Example:
+            for batch, y_pred, y_sigma, acq_score in model.predict_stream(proteins):
+                ...
+        """
+        acq = self._acq_fn(acq_fn)
+
+        for _, batch_proteins, y_pred, sigma_pred in self._predict_batches(
+            proteins, rep_path=rep_path, batch_size=batch_size
+        ):
+            acq_score = acq(y_pred, sigma_pred, self.y_best)
+            yield batch_proteins, y_pred, sigma_pred, acq_score
+
+    def predict_batch(
+        self,
+        proteins: list,
+        N=96,
+        acq_fn="qei",
+        rep_path=None,
+        pool_size=2000,
+        batch_size=10000,
+    ):
+        """
+        Selects a batch of N proteins for parallel assays with a batch acquisition
+        function, which accounts for the correlation between picks instead of
+        ranking proteins independently. The candidates are narrowed down to the
+        pool_size proteins with the highest upper confidence bound, over which the
+        joint GP posterior is computed once.
+
+        Args:
+            proteins (list): List of candidate proteins.
+            N (int): Batch size, e.g. 96 for a plate. Default 96.
+            acq_fn (str): Batch acquisition function, 'qei' (Monte Carlo q-EI) or
+                'kb' (kriging believer with EI). Default 'qei'.
+            rep_path (str): Path to representations for proteins in the list.
+            pool_size (int): Number of candidates considered for the batch. Default 2000.
+            batch_size (int): Number of proteins loaded and predicted at once.
+
+        Returns:
+            tuple: selected proteins in order of selection, their predictions,
+                standard deviations, y values and acquisition scores.
+        """
+        if self.model_type not in self._pt_models:
+            raise ValueError(
+                f"Batch acquisition requires a GP model {self._pt_models}, not '{self.model_type}'"
+            )
+
+        if acq_fn not in BO.batch_acq_fns:
+            raise ValueError(
+                f"'{acq_fn}' is not a supported batch acquisition function"
+            )
+
+        pool, y_pred, y_sigma, _, _ = self.predict(
+            proteins,
+            rep_path=rep_path,
+            acq_fn="ucb",
+            batch_size=batch_size,
+            top_k=max(pool_size, N),
+        )
+
+        x = self._gp_input(self.load_representations(pool, rep_path))
+        mean, cov = predict_gp_joint(self._model, x, fast_pred_var=True)
+        mean, cov = mean.cpu().numpy(), cov.cpu().numpy()
+
+        if acq_fn == "qei":
+            selected, acq_score = BO.qEI(mean, cov, N, self.y_best, seed=self.seed)
+        else:
+            selected, acq_score = BO.kriging_believer(
+                mean, cov, N, self.y_best, noise=self.likelihood.noise.item()
+            )
+
+        batch = [pool[i] for i in selected]
+        y_batch = [prot.y for prot in batch]
+
+        return batch, y_pred[selected], y_sigma[selected], y_batch, acq_score
+
+    def _acq_fn(self, acq_fn):
+        """
+        Returns the acquisition function for its name.
+        """
+        if acq_fn not in BO.acq_fns:
+            raise ValueError(f"'{acq_fn}' is not a supported acquisition function")
+
+        return BO.acq_fns[acq_fn]
+
+    def _predict_batches(self, proteins: list, rep_path=None, batch_size=10000):
+        """
+        Yields the start index, proteins, predictions and standard deviations of
+        consecutive batches of proteins.
+        """
+        if self._model is None:
+            raise ValueError("Model is 'None'")
 
         for i in range(0, len(proteins), batch_size):
             batch_proteins = proteins[i : i + batch_size]
             batch_reps = self.load_representations(batch_proteins, rep_path)
 
-            if len(batch_reps[0].shape) == 2:
-                batch_reps = [x.view(-1) for x in batch_reps]
-
             # GP
-            if self.model_type == "gp":
-                self.likelihood.eval()
-                x = torch.stack(batch_reps).to(device=self.device)
-                y_pred, sigma_pred = predict_gp(self._model, self.likelihood, x)
+            if self.model_type in self._pt_models:
+                x = self._gp_input(batch_reps)
+                y_pred, sigma_pred = predict_gp(
+                    self._model,
+                    self.likelihood,
+                    x,
+                    batch_size=batch_size,
+                    fast_pred_var=True,
+                )
                 y_pred = y_pred.cpu().numpy()
                 sigma_pred = sigma_pred.cpu().numpy()
-                acq_score = acq(y_pred, sigma_pred, self.y_best)
 
             # Handle ensembles
             elif isinstance(self._model, list):
-                ys = []
-                for model in self._model:
-                    x = torch.stack(batch_reps).cpu().numpy()
-                    y_pred = model.predict(x)
-                    ys.append(y_pred)
+                x = self._sklearn_input(batch_reps)
+                ys = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                    delayed(model.predict)(x) for model in self._model
+                )
 
                 y_stack = np.stack(ys)
                 y_pred = np.mean(y_stack, axis=0)
                 sigma_pred = np.std(y_stack, axis=0)
-                acq_score = acq(y_pred, sigma_pred, self.y_best)
 
             # Handle single model
             else:
-                x = torch.stack(batch_reps).cpu().numpy()
+                x = self._sklearn_input(batch_reps)
                 y_pred = self._model.predict(x)
                 sigma_pred = np.zeros_like(y_pred)
-                acq_score = acq(y_pred, sigma_pred, self.y_best)
-
-            all_y_pred.extend(y_pred)
-            all_sigma_pred.extend(sigma_pred)
-            all_acq_scores.extend(acq_score)
-
-        all_y_pred = np.array(all_y_pred)
-        all_sigma_pred = np.array(all_sigma_pred)
-        all_acq_scores = np.array(all_acq_scores)
-
-        # Sort acquisition scores and get sorted indices
-        sorted_indices = np.argsort(all_acq_scores)[::-1]
-
-        # Sort all lists/arrays by the sorted indices
-        val_data = [proteins[i] for i in sorted_indices]
-        y_val = [prot.y for prot in val_data]
-        y_val_pred = all_y_pred[sorted_indices]
-        y_val_sigma = all_sigma_pred[sorted_indices]
-        sorted_acq_score = all_acq_scores[sorted_indices]
 
-        for i, prot in enumerate(val_data):
-            prot.y_pred = y_val_pred[i]
-            prot.y_sigma = y_val_sigma[i]
-
-        return val_data, y_val_pred, y_val_sigma, y_val, sorted_acq_score
+            yield i, batch_proteins, y_pred, sigma_pred
 
     def score(self, proteins: list, rep_path=None):
         """
@@ -985,10 +1332,7 @@ class Model:
 
         reps = self.load_representations(proteins, rep_path)
 
-        if len(reps[0].shape) == 2:
-            reps = [x.view(-1) for x in reps]
-
-        x = torch.stack(reps).cpu().numpy()
+        x = self._sklearn_input(reps)
         y = [protein.y for protein in proteins]
 
         # ensemble
@@ -1056,7 +1400,12 @@ class Model:
         pbar=None,
         acq_fn="ei",
     ):
-        """Search for new mutants or select variants from a set of sequences"""
+        """
+        Search for new mutants or select variants from a set of sequences.
+
+        For numerical data, acq_fn may be a batch acquisition function ('qei' or
+        'kb'), which returns a batch of N mutants selected jointly.
+        """
 
         if self.y_type == "class":
             out, mask = self._class_search(
@@ -1065,6 +1414,7 @@ class Model:
             return out, mask
         elif self.y_type == "num":
             out = self._num_search(
+                N=N,
                 method=method,
                 optim_problem=optim_problem,
                 max_eval=max_eval,
@@ -1091,7 +1441,8 @@ class Model:
             N (int): Number of sequences to be returned.
             optim_problem (float): Minimization or maximization of y-values. Default 'max', alternatively 'min'.
             labels (list): list of labels to sample from. Default ['all'] will sample from all labels.
-            method (str): Method used for sampling. Default 'ga' - Genetic Algorithm.
+            method (str): Method used for sampling. Default 'ga' - simulated annealing, 'k_center' for
+                greedy max-min selection, which is faster for large libraries.
             max_eval (int): Maximum number of evaluations. Default 1000.
             pbar: Progress bar for ProteusAI app.
         """
@@ -1116,11 +1467,16 @@ class Model:
             full_indices = list(full_indices)
 
         vectors = self.load_representations(proteins, rep_path=self.library.rep_path)
+        if sp.issparse(vectors):
+            vectors = vectors.toarray()
 
         if pbar:
             pbar.set(message=f"Searching {N} diverse sequences", detail="...")
 
-        selected_indices, diversity = BO.simulated_annealing(vectors, N, pbar=pbar)
+        if method == "k_center":
+            selected_indices, diversity = BO.k_center_greedy(vectors, N, pbar=pbar)
+        else:
+            selected_indices, diversity = BO.simulated_annealing(vectors, N, pbar=pbar)
 
         # Map selected_indices back to full_protein list using full_indices
         full_selected_indices = [full_indices[i] for i in selected_indices]
@@ -1167,6 +1523,7 @@ class Model:
 
     def _num_search(
         self,
+        N=10,
         optim_problem="max",
         method="ga",
         max_eval=10000,
@@ -1285,9 +1642,14 @@ class Model:
         if self.x not in self._in_memory_representations:
             library.compute(method=self.x, pbar=pbar, batch_size=batch_size)
 
-        val_data, y_pred, y_sigma, y_val, acq_score = self.predict(
-            library.proteins, acq_fn=acq_fn
-        )
+        if acq_fn in BO.batch_acq_fns:
+            val_data, y_pred, y_sigma, y_val, acq_score = self.predict_batch(
+                library.proteins, N=N, acq_fn=acq_fn
+            )
+        else:
+            val_data, y_pred, y_sigma, y_val, acq_score = self.predict(
+                library.proteins, acq_fn=acq_fn
+            )
 
         self.search_df = self.save_to_csv(
             val_data, y_val, y_pred, y_sigma, csv_file, acq_scores=acq_score
@@ -95,7 +95,6 @@ class Protein:
         # Parameters
         self.pdb_file = None
         self.fasta_file = None
-        self.reps = []
         self.source_path = None
         self.rep_path = None
         self.struc_path = None
@@ -141,18 +140,15 @@ class Protein:
         self.rep_path = os.path.join(self.source_path, "zero_shot/rep")
         self.struc_path = os.path.join(self.source_path, "zero_shot/struc")
 
-        # create user library if user does not exist
-        if not os.path.exists(self.user):
-            os.makedirs(self.user)
-            if self.fname and not os.path.exists(
-                os.path.join(self.user, self.fname.split(".")[0])
-            ):
-                fname = self.fname.split(".")[0]
-                os.makedirs(os.path.join(self.user, f"{fname}"))
-                os.makedirs(os.path.join(self.user, f"{fname}/library"))
-                os.makedirs(os.path.join(self.user, f"{fname}/zero_shot"))
-                os.makedirs(os.path.join(self.user, f"{fname}/design"))
-            print(f"User created at {self.user}")
+        # create user library if user does not exist, another process may
+        # create it at the same time
+        os.makedirs(self.user, exist_ok=True)
+        if self.fname:
+            fname = self.fname.split(".")[0]
+            os.makedirs(os.path.join(self.user, f"{fname}/library"), exist_ok=True)
+            os.makedirs(os.path.join(self.user, f"{fname}/zero_shot"), exist_ok=True)
+            os.makedirs(os.path.join(self.user, f"{fname}/design"), exist_ok=True)
+        print(f"User created at {self.user}")
 
     def init_from_inheritance(self):
         pass
@@ -278,51 +274,99 @@ class Protein:
         return view
 
     ### Zero-shot prediction ###
-    def zs_prediction(
-        self, model="esm2", batch_size=100, pbar=None, device=None, chain=None
-    ):
+    def _zs_dest(self, model="esm2", chain=None, mode="masked_marginal"):
         """
-        Compute zero-shot scores
-
-        Args:
-            model (str): Model used to compute ZS scores
-            batch_size (int): Batch size used to compute ZS-Scores
-            pbar: App progress bar
-            device (str): Choose hardware for computation. Default 'None' for autoselection
-                        other options are 'cpu' and 'cuda'.
+        Returns the sequence and the results directory of a zero-shot computation.
+        Results of approximate modes are kept next to the exact ones in '<model>_<mode>'.
         """
-
         # Set a default chain if none is provided and there are chains available
         if chain is None and len(self.chains) >= 1:
             chain = self.chains[0]
 
+        result_dir = model if mode == "masked_marginal" else f"{model}_{mode}"
+
         # Now ensure chain has a value before proceeding
         if chain is not None and len(self.chains) >= 1:
             seq = self.seq[chain]
-            dest = os.path.join(self.zs_path, "results", chain, model)
+            dest = os.path.join(self.zs_path, "results", chain, result_dir)
         else:
             seq = self.seq
-            dest = os.path.join(self.zs_path, "results", model)
+            dest = os.path.join(self.zs_path, "results", result_dir)
 
-        # Check if results already exist
-        if os.path.exists(dest):
+        return seq, dest
+
+    def zs_prediction(
+        self,
+        model="esm2",
+        batch_size=100,
+        pbar=None,
+        device=None,
+        chain=None,
+        mode="masked_marginal",
+        mask_k=4,
+    ):
+        """
+        Compute zero-shot scores
+
+        Args:
+            model (str): Model used to compute ZS scores
+            batch_size (int): Batch size used to compute ZS-Scores
+            pbar: App progress bar
+            device (str): Choose hardware for computation. Default 'None' for autoselection
+                        other options are 'cpu' and 'cuda'.
+            mode (str): 'masked_marginal' (exact, one pass per position), 'wt_marginal'
+                (one unmasked pass) or 'multi_mask' (mask_k positions per pass).
+            mask_k (int): Masked positions per pass in 'multi_mask' mode. Default 4.
+        """
+        seq, dest = self._zs_dest(model, chain, mode)
+
+        # Results are cached by content (sequence, model, mode), the project
+        # directory is only reused if it holds results for the same key
+        key = esm_tools.zs_cache.key(seq, model, mode=mode, mask_k=mask_k)
+        key_file = os.path.join(dest, "cache_key")
+        cached_key = None
+        if os.path.exists(key_file):
+            with open(key_file) as f:
+                cached_key = f.read()
+        if cached_key == key:
             print(f"Results already computed. Loading from {dest}")
             p = torch.load(os.path.join(dest, "prob_dist.pt"))
             mmp = torch.load(os.path.join(dest, "masked_marginal_probability.pt"))
             entropy = torch.load(os.path.join(dest, "per_position_entropy.pt"))
             logits = torch.load(os.path.join(dest, "masked_logits.pt"))
-            df = pd.read_csv(os.path.join(dest, "zs_scores.csv"))
+            df, seqs = self._load_zs_scores(dest)
+            # same columns as freshly computed results
+            if seqs is not None:
+                df.insert(1, "sequence", list(seqs))
+                seqs = None
         else:
-            # Perform computation if results do not exist
-            print("Computing logits")
-            logits, alphabet = esm_tools.get_mutant_logits(
-                seq, batch_size=batch_size, model=model, pbar=pbar, device=device
-            )
+            cached = esm_tools.zs_cache.get(key)
+            if cached is not None and cached["seq"] == seq:
+                print("Loading cached zero-shot results")
+                logits, p = cached["logits"], cached["p"]
+                mmp, entropy = cached["mmp"], cached["entropy"]
+                alphabet = esm_tools.alphabet
+            else:
+                # Perform computation if results do not exist
+                print("Computing logits")
+                logits, alphabet = esm_tools.get_mutant_logits(
+                    seq,
+                    batch_size=batch_size,
+                    model=model,
+                    pbar=pbar,
+                    device=device,
+                    mode=mode,
+                    mask_k=mask_k,
+                )
 
-            # Calculations
-            p = esm_tools.get_probability_distribution(logits)
-            mmp = esm_tools.masked_marginal_probability(p, seq, alphabet)
-            entropy = esm_tools.per_position_entropy(p)
+                # Calculations
+                p = esm_tools.get_probability_distribution(logits)
+                mmp = esm_tools.masked_marginal_probability(p, seq, alphabet)
+                entropy = esm_tools.per_position_entropy(p)
+
+                esm_tools.zs_cache.put(
+                    key, seq=seq, logits=logits, p=p, mmp=mmp, entropy=entropy
+                )
 
             # Create directory if it doesn't exist
             if not os.path.exists(dest):
@@ -343,6 +387,10 @@ class Protein:
             df = esm_tools.zs_to_csv(
                 seq, alphabet, p, mmp, entropy, os.path.join(dest, "zs_scores.csv")
             )
+            seqs = None
+
+            with open(key_file, "w") as f:
+                f.write(key)
 
             # no true y_values
             ys = [None] * len(mmp)  # noqa: F841
@@ -359,9 +407,80 @@ class Protein:
             "class_dict": self.class_dict,
             "pred_data": True,
         }
+        if seqs is not None:
+            out["seqs"] = seqs
 
         return out
 
+    def _load_zs_scores(self, dest):
+        """
+        Loads saved zero-shot scores from dest. Scores saved in columnar form are
+        loaded with lazily built mutant sequences, older results from the csv file.
+
+        Returns:
+            tuple: pd.DataFrame and mutant sequences (None if they are a column of the DataFrame).
+        """
+        if os.path.exists(os.path.join(dest, "zs_scores.npz")):
+            return esm_tools.load_zs_scores(os.path.join(dest, "zs_scores.npz"))
+
+        return pd.read_csv(os.path.join(dest, "zs_scores.csv")), None
+
+    def zs_agreement(
+        self,
+        model="esm2",
+        modes=("wt_marginal", "multi_mask"),
+        batch_size=100,
+        pbar=None,
+        device=None,
+        chain=None,
+        mask_k=4,
+        top_k=50,
+    ):
+        """
+        Report how well approximate zero-shot modes agree with exact masked marginals.
+        Missing results are computed with zs_prediction.
+
+        Args:
+            model (str): Model used to compute ZS scores
+            modes (tuple): Approximate modes to compare. Default ('wt_marginal', 'multi_mask').
+            batch_size (int): Batch size used to compute ZS-Scores
+            pbar: App progress bar
+            device (str): Choose hardware for computation.
+            chain (str): Chain of the protein. Default None takes the first chain.
+            mask_k (int): Masked positions per pass in 'multi_mask' mode. Default 4.
+            top_k (int): Number of top ranked mutants used for the overlap. Default 50.
+
+        Returns:
+            pd.DataFrame: spearman, pearson and top_k overlap per mode.
+        """
+        mmps = {}
+        for mode in ["masked_marginal"] + list(modes):
+            self.zs_prediction(
+                model=model,
+                batch_size=batch_size,
+                pbar=pbar,
+                device=device,
+                chain=chain,
+                mode=mode,
+                mask_k=mask_k,
+            )
+            seq, dest = self._zs_dest(model, chain, mode)
+            mmps[mode] = torch.load(
+                os.path.join(dest, "masked_marginal_probability.pt")
+            )
+
+        rows = [
+            {
+                "mode": mode,
+                **esm_tools.zs_agreement(
+                    mmps["masked_marginal"], mmps[mode], seq, top_k=top_k
+                ),
+            }
+            for mode in modes
+        ]
+
+        return pd.DataFrame(rows)
+
     def zs_library(self, model="esm2", chain=None):
         """
         Generate zero-shot library.
@@ -386,49 +505,13 @@ class Protein:
 
         # load already computed zs scores
         if os.path.exists(zs_results_path):
-            df = pd.read_csv(zs_results_path)
+            df, seqs = self._load_zs_scores(os.path.dirname(zs_results_path))
 
-        # generate df with blank y-values
+        # generate df with blank y-values, mutant sequences are built on demand
         else:
-            # wt_seq = self.seq
-            canonical_aas = [
-                "A",
-                "R",
-                "N",
-                "D",
-                "C",
-                "Q",
-                "E",
-                "G",
-                "H",
-                "I",
-                "L",
-                "K",
-                "M",
-                "F",
-                "P",
-                "S",
-                "T",
-                "W",
-                "Y",
-                "V",
-            ]
-            mutants, sequences = [], []
-            for pos in range(len(wt_seq)):
-                for aa in canonical_aas:
-                    if wt_seq[pos] != aa:
-                        mutants.append(wt_seq[pos] + str(pos + 1) + aa)
-                        sequences.append(wt_seq[:pos] + aa + wt_seq[pos + 1 :])
-            ys = [None] * len(mutants)
-
-            df = pd.DataFrame(
-                {
-                    "mutant": mutants,
-                    "sequence": sequences,
-                    "p": ys,
-                    "mmp": ys,
-                    "entropy": ys,
-                }
+            df = esm_tools.mutant_table(wt_seq, sequences=False)
+            seqs = esm_tools.MutantSequences(
+                wt_seq, *esm_tools.mutant_positions(wt_seq)
             )
 
         out = {
@@ -442,6 +525,8 @@ class Protein:
             "reps": self.reps,
             "class_dict": self.class_dict,
         }
+        if seqs is not None:
+            out["seqs"] = seqs
 
         return out
 
@@ -784,3 +869,102 @@ class Protein:
                 f"Expected 'rep' to be of type 'int', 'float', or 'str', but got '{type(value).__name__}'"
             )
         self._y = value
+
+
+class ProteinRecord:
+    """
+    Compact protein entry used by libraries and models, holding only the row
+    data of a protein. Use Protein for structure, design and zero-shot workflows.
+
+    Attributes:
+        name (str): Name/id of the protein.
+        seq (str): Protein sequence.
+        y (float, int, str): Label for the protein.
+        y_pred (float, int, str): Predicted y_value.
+        y_sigma (float): Uncertainty of the prediction.
+        acq_score (float): acquisition score.
+        reps (list): List of available representations, stored as bitmask.
+    """
+
+    __slots__ = ("name", "seq", "y", "y_pred", "y_sigma", "acq_score", "_rep_mask")
+
+    # representation name -> bit, shared by all records
+    _rep_bits = {}
+
+    def __init__(
+        self,
+        name: Union[str, None] = None,
+        seq: Union[str, None] = None,
+        y=None,
+        y_pred=None,
+        y_sigma=None,
+        acq_score=None,
+        reps: Union[list, tuple] = (),
+    ):
+        self.name = name
+        self.seq = seq
+        self.y = y
+        self.y_pred = y_pred
+        self.y_sigma = y_sigma
+        self.acq_score = acq_score
+        self.reps = reps
+
+    def __str__(self):
+        return f"proteusAI.ProteinRecord():\n____________________\nname\t: {self.name}\nseq\t: {self.seq}\nrep\t: {self.reps}\ny:\t{self.y}\ny_pred:\t{self.y_pred}\ny_sig:\t{self.y_sigma}\n"
+
+    __repr__ = __str__
+
+    @classmethod
+    def _rep_bit(cls, rep: str) -> int:
+        if rep not in cls._rep_bits:
+            cls._rep_bits[rep] = 1 << len(cls._rep_bits)
+        return cls._rep_bits[rep]
+
+    @property
+    def reps(self):
+        return [rep for rep, bit in self._rep_bits.items() if self._rep_mask & bit]
+
+    @reps.setter
+    def reps(self, value):
+        if not isinstance(value, (list, tuple)) and value is not None:
+            raise TypeError(
+                f"Expected 'rep' to be of type 'list' or 'tuple', but got '{type(value).__name__}'"
+            )
+        mask = 0
+        for rep in value or ():
+            mask |= self._rep_bit(rep)
+        self._rep_mask = mask
+
+    def add_rep(self, rep: str):
+        """
+        Marks a representation as available.
+        """
+        self._rep_mask |= self._rep_bit(rep)
+
+    def has_rep(self, rep: str) -> bool:
+        """
+        Returns True if the representation is available.
+        """
+        return bool(self._rep_mask & self._rep_bits.get(rep, 0))
+
+    def to_protein(self, user: Union[str, None] = "guest") -> Protein:
+        """
+        Creates a full Protein object from the record.
+
+        Args:
+            user (str): Path to the user. Default guest.
+
+        Returns:
+            Protein: protein object.
+        """
+        protein = Protein(
+            self.name,
+            self.seq,
+            reps=self.reps,
+            user=user,
+            y=self.y,
+            y_pred=self.y_pred,
+            y_sigma=self.y_sigma,
+            acq_score=self.acq_score,
+        )
+        return protein
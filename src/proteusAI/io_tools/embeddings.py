@@ -5,6 +5,9 @@ __name__ = "proteusAI"
 __author__ = "Jonathan Funk"
 
 import os
+import json
+import hashlib
+import numpy as np
 import torch
 from typing import Union
 
@@ -27,6 +30,15 @@ def load_embeddings(
         names, sequences = load('/path/to/representations')
     """
 
+    if EmbeddingStore.exists(path):
+        store = open_embedding_store(path)
+        if names is None:
+            names = store.names
+        else:
+            names = [n[:-3] if n.endswith(".pt") else n for n in names]
+        tensors = list(store.get(names))
+        return names, tensors
+
     tensors = []
     if names is None:
         files = [os.path.join(path, f) for f in os.listdir(path) if f.endswith(".pt")]
@@ -40,3 +52,791 @@ def load_embeddings(
             tensors.append(t)
 
     return names, tensors
+
+
+def sequence_hash(seq) -> str:
+    """
+    Hash of a sequence, used to find representations of identical sequences.
+    """
+    return hashlib.sha1(str(seq).encode()).hexdigest()
+
+
+# numpy dtypes the storage dtypes are written as, bfloat16 is kept as raw 16 bit words
+storage_dtypes = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "bfloat16": np.uint16,
+    "int8": np.int8,
+}
+
+
+class EmbeddingProjection:
+    """
+    Linear projection of representations to fewer dimensions, either onto the
+    principal components of a sample of representations ('pca') or onto a
+    gaussian random matrix ('random'). Projections are saved next to the
+    representations of an EmbeddingStore and applied when they are loaded.
+
+    Args:
+        components (torch.Tensor): Projection matrix of shape (dim, n_components).
+        mean (torch.Tensor): Mean subtracted before projecting. Default None.
+        method (str): Method the projection was fitted with.
+
+    Example:
+        projection = EmbeddingProjection.fit(x, n_components=128)
+        x_small = projection.transform(x)
+    """
+
+    methods = ["pca", "random"]
+
+    def __init__(
+        self,
+        components: torch.Tensor,
+        mean: Union[torch.Tensor, None] = None,
+        method: str = "pca",
+    ):
+        self.components = components.float()
+        self.mean = None if mean is None else mean.float()
+        self.method = method
+
+    @property
+    def n_components(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(
+        cls,
+        x: torch.Tensor,
+        n_components: int = 128,
+        method: str = "pca",
+        seed: Union[int, None] = None,
+    ):
+        """
+        Fits a projection to representations.
+
+        Args:
+            x (torch.Tensor): Representations of shape (n, dim).
+            n_components (int): Number of output dimensions. Default 128.
+            method (str): 'pca' or 'random'. Default 'pca'.
+            seed (int): Random seed of the random projection. Default None.
+
+        Returns:
+            EmbeddingProjection: the fitted projection.
+        """
+        if method not in cls.methods:
+            raise ValueError(
+                f"'{method}' is not a supported projection. Choose from {cls.methods}"
+            )
+
+        x = torch.as_tensor(x).float()
+        dim = x.shape[1]
+        if method == "pca":
+            if n_components > min(x.shape):
+                raise ValueError(
+                    f"n_components={n_components} exceeds the rank of {x.shape[0]} x {dim} representations"
+                )
+            mean = x.mean(0)
+            _, _, vh = torch.linalg.svd(x - mean, full_matrices=False)
+            return cls(vh[:n_components].T.contiguous(), mean=mean, method=method)
+
+        generator = torch.Generator()
+        if seed is not None:
+            generator.manual_seed(seed)
+        components = torch.randn(dim, n_components, generator=generator)
+        return cls(components / n_components**0.5, method=method)
+
+    def transform(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Projects representations of shape (n, dim) to (n, n_components).
+        """
+        x = torch.as_tensor(x).float()
+        if self.mean is not None:
+            x = x - self.mean
+        return x @ self.components
+
+    def save(self, path: str):
+        torch.save(
+            {"components": self.components, "mean": self.mean, "method": self.method},
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        return cls(**torch.load(path, map_location="cpu"))
+
+
+class EmbeddingStore:
+    """
+    Appendable, memory-mapped store for fixed size sequence representations.
+
+    All representations of a directory are kept in one dense row-major matrix
+    ('embeddings.bin'), a name to row index ('index.tsv') and a small manifest
+    ('meta.json') with the number of rows and metadata on how the representations
+    were computed (e.g. model, layer, dtype). Rows are appended before the index
+    and the manifest is replaced atomically, so an interrupted write never exposes
+    partially written rows. The manifest records the committed number of rows and
+    index size, data and index lines past them are dropped by the next append.
+    Membership queries are dictionary lookups.
+
+    Representations can be appended with a key per name, usually the
+    sequence_hash of the sequence ('keys.tsv'). Names with the same key can then
+    be linked to the stored representation instead of storing it again.
+
+    Representations can be stored as 'float32', 'float16', 'bfloat16' or 'int8'.
+    int8 rows are quantized symmetrically with one float32 scale per row
+    ('scales.bin'). An EmbeddingProjection saved in the store ('projection.pt')
+    is applied to all loaded representations.
+
+    Args:
+        path (str): Directory of the store, e.g. 'rep/esm2'.
+        dim (int): Size of the representations. Inferred on the first append if None.
+        dtype (str): Storage dtype of new stores. Default 'float32'.
+
+    Example:
+        store = EmbeddingStore('rep/esm2', dtype='float16')
+        store.append(['seq1', 'seq2'], reps)
+        x = store.get(['seq1', 'seq2'])
+    """
+
+    data_file = "embeddings.bin"
+    scale_file = "scales.bin"
+    index_file = "index.tsv"
+    keys_file = "keys.tsv"
+    meta_file = "meta.json"
+    projection_file = "projection.pt"
+    layout = "sequence"
+
+    def __init__(self, path: str, dim: Union[int, None] = None, dtype="float32"):
+        self.path = path
+        self.dim = dim
+        self.dtype = self._check_dtype(dtype)
+        self.n_rows = 0
+        self.index = {}
+        self.index_bytes = 0
+        self.keys = {}
+        self.names_by_key = {}
+        self.keys_bytes = 0
+        self.metadata = {}
+        self.projection = None
+        self.projection_version = 0
+        self.generation = 0
+        self._mmap = None
+        self._scales = None
+        self._version = None
+
+        if os.path.exists(os.path.join(path, self.meta_file)):
+            self._read()
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """
+        Returns True if path contains an embedding store.
+        """
+        return os.path.exists(os.path.join(path, cls.meta_file))
+
+    @classmethod
+    def layout_of(cls, path: str) -> str:
+        """
+        Returns the layout of the store in path, 'sequence' or 'residue'.
+        """
+        with open(os.path.join(path, cls.meta_file)) as f:
+            return json.load(f).get("layout", EmbeddingStore.layout)
+
+    @property
+    def names(self) -> list:
+        """
+        Names of all stored representations in row order.
+        """
+        return sorted(self.index, key=self.index.get)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @staticmethod
+    def _check_dtype(dtype) -> str:
+        dtype = str(dtype).replace("torch.", "")
+        if dtype not in storage_dtypes:
+            raise ValueError(
+                f"'{dtype}' is not a supported storage dtype. Choose from {list(storage_dtypes)}"
+            )
+        return dtype
+
+    @property
+    def output_dim(self) -> Union[int, None]:
+        """
+        Size of loaded representations, after projection.
+        """
+        if self.projection is not None:
+            return self.projection.n_components
+        return self.dim
+
+    def _meta_version(self):
+        stat = os.stat(os.path.join(self.path, self.meta_file))
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        self._version = self._meta_version()
+        with open(os.path.join(self.path, self.meta_file)) as f:
+            meta = json.load(f)
+        layout = meta.get("layout", EmbeddingStore.layout)
+        if layout != self.layout:
+            raise ValueError(
+                f"'{self.path}' holds {layout} representations, not {self.layout} representations"
+            )
+        self.dim = meta["dim"]
+        self.dtype = meta["dtype"]
+        self.n_rows = meta["n_rows"]
+        self.metadata = meta.get("metadata", {})
+        self.data_file = meta.get("data_file", EmbeddingStore.data_file)
+        self.scale_file = meta.get("scale_file", EmbeddingStore.scale_file)
+        self.generation = meta.get("generation", 0)
+        self.projection_version = meta.get("projection_version", 0)
+
+        # stores written before the projection was recorded in the manifest
+        # have a projection if the file exists
+        projection_path = os.path.join(self.path, self.projection_file)
+        if meta.get("projection", True) and os.path.exists(projection_path):
+            self.projection = EmbeddingProjection.load(projection_path)
+        else:
+            self.projection = None
+
+        index_path = os.path.join(self.path, self.index_file)
+        self.index_bytes = meta.get("index_bytes")
+        if self.index_bytes is None:
+            # stores written before the index size was recorded
+            exists = os.path.exists(index_path)
+            self.index_bytes = os.path.getsize(index_path) if exists else 0
+        self.index = self._read_index(index_path) if self.index_bytes else {}
+        self.keys_bytes = meta.get("keys_bytes", 0)
+        self._read_keys()
+        self._mmap = None
+        self._scales = None
+
+    def _read_index(self, index_path: str) -> dict:
+        # only the part of the index committed by the manifest is read
+        with open(index_path, "rb") as f:
+            lines = f.read(self.index_bytes).decode().splitlines()
+
+        index = {}
+        for line in lines:
+            name, entry, end = self._parse_index_line(line)
+            # rows past n_rows belong to an interrupted append
+            if end <= self.n_rows:
+                index[name] = entry
+        return index
+
+    def _read_keys(self):
+        self.keys, self.names_by_key = {}, {}
+        if not self.keys_bytes:
+            return
+
+        with open(os.path.join(self.path, self.keys_file), "rb") as f:
+            lines = f.read(self.keys_bytes).decode().splitlines()
+        for line in lines:
+            key, name = line.split("\t", 1)
+            if name in self.index:
+                self._set_key(name, key)
+
+    def _write_keys(self, names: list, keys: list):
+        lines = "".join(f"{key}\t{name}\n" for name, key in zip(names, keys))
+        lines = lines.encode()
+        with open(os.path.join(self.path, self.keys_file), "ab") as f:
+            f.truncate(self.keys_bytes)
+            f.write(lines)
+        self.keys_bytes += len(lines)
+
+        for name, key in zip(names, keys):
+            self._set_key(name, key)
+
+    def _set_key(self, name: str, key: str):
+        if key:
+            self.keys[name] = key
+            self.names_by_key.setdefault(key, name)
+        else:
+            self.keys.pop(name, None)
+
+    def name_of(self, key: str) -> Union[str, None]:
+        """
+        Returns a stored name with key, None if no representation has that key.
+        """
+        name = self.names_by_key.get(key)
+        if name is not None and self.keys.get(name) != key:
+            # the name was appended again with another key
+            name = next((n for n, k in self.keys.items() if k == key), None)
+            if name is None:
+                del self.names_by_key[key]
+            else:
+                self.names_by_key[key] = name
+        return name
+
+    def link(self, names: list, sources: list, keys: Union[list, None] = None):
+        """
+        Points names to the stored representations of sources without copying them.
+
+        Args:
+            names (list): New names.
+            sources (list): Stored names whose representations are shared.
+            keys (list): Keys of the names. Default None uses the keys of sources.
+        """
+        if len(names) == 0:
+            return
+
+        entries = [self.index[source] for source in sources]
+        if keys is None:
+            keys = [self.keys.get(source) for source in sources]
+
+        self._write_index(names, entries)
+        self.index.update(zip(names, entries))
+        keyed = [(name, key) for name, key in zip(names, keys) if key is not None]
+        if keyed:
+            self._write_keys(*zip(*keyed))
+        self._write_meta()
+
+    @staticmethod
+    def _parse_index_line(line: str) -> tuple:
+        name, row = line.rsplit("\t", 1)
+        return name, int(row), int(row) + 1
+
+    @staticmethod
+    def _format_index_line(name: str, entry) -> str:
+        return f"{name}\t{entry}\n"
+
+    def _write_index(self, names: list, entries: list):
+        lines = "".join(
+            self._format_index_line(name, entry) for name, entry in zip(names, entries)
+        ).encode()
+        with open(os.path.join(self.path, self.index_file), "ab") as f:
+            # drop index lines of an interrupted append before writing
+            f.truncate(self.index_bytes)
+            f.write(lines)
+        self.index_bytes += len(lines)
+
+    def _write_meta(self):
+        meta = {
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "n_rows": self.n_rows,
+            "index_bytes": self.index_bytes,
+            "keys_bytes": self.keys_bytes,
+            "metadata": self.metadata,
+            "layout": self.layout,
+            "data_file": self.data_file,
+            "scale_file": self.scale_file,
+            "generation": self.generation,
+            "projection": self.projection is not None,
+            "projection_version": self.projection_version,
+        }
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, self.meta_file)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._version = self._meta_version()
+
+    def refresh(self):
+        """
+        Re-reads the store if it was changed by another store object or process.
+
+        Returns:
+            EmbeddingStore: the store.
+        """
+        if self.exists(self.path) and self._meta_version() != self._version:
+            self._read()
+        return self
+
+    def update_metadata(self, **metadata):
+        """
+        Records how the representations were computed. Raises a ValueError if the
+        store already holds representations computed differently.
+
+        Args:
+            **metadata: e.g. model='esm2', rep_layer=33, dtype='float32'.
+        """
+        for key, value in metadata.items():
+            current = self.metadata.get(key)
+            if self.n_rows > 0 and current is not None and current != value:
+                raise ValueError(
+                    f"Representations in '{self.path}' were computed with {key}={current}, got {key}={value}"
+                )
+
+        if any(self.metadata.get(key) != value for key, value in metadata.items()):
+            self.metadata.update(metadata)
+            self._write_meta()
+
+    def _memmap(self):
+        if self._mmap is None and self.n_rows > 0:
+            self._mmap = np.memmap(
+                os.path.join(self.path, self.data_file),
+                dtype=storage_dtypes[self.dtype],
+                mode="c",
+                shape=(self.n_rows, self.dim),
+            )
+            if self.dtype == "int8":
+                self._scales = np.memmap(
+                    os.path.join(self.path, self.scale_file),
+                    dtype=np.float32,
+                    mode="c",
+                    shape=(self.n_rows,),
+                )
+        return self._mmap
+
+    @staticmethod
+    def _encode(reps: np.ndarray, dtype: str) -> tuple:
+        """
+        Converts float32 rows to a storage dtype. Returns the rows and the
+        per-row scales of int8 rows (None otherwise).
+        """
+        if dtype == "bfloat16":
+            rows = torch.from_numpy(reps).to(torch.bfloat16).view(torch.int16)
+            return rows.numpy().view(np.uint16), None
+        if dtype == "int8":
+            scales = np.abs(reps).max(axis=1) / 127
+            scales[scales == 0] = 1
+            rows = np.clip(np.rint(reps / scales[:, None]), -127, 127)
+            return rows.astype(np.int8), scales.astype(np.float32)
+        return reps.astype(storage_dtypes[dtype], copy=False), None
+
+    @staticmethod
+    def _decode(data: np.ndarray, dtype: str, scales=None) -> torch.Tensor:
+        """
+        Converts stored rows back to float32 tensors.
+        """
+        if dtype == "float32":
+            return torch.from_numpy(np.asarray(data))
+        if dtype == "bfloat16":
+            words = torch.from_numpy(np.array(data).view(np.int16))
+            return words.view(torch.bfloat16).float()
+        if dtype == "int8":
+            return torch.from_numpy(data * scales[:, None])
+        return torch.from_numpy(np.asarray(data, dtype=np.float32))
+
+    def _read_rows(self, rows: np.ndarray) -> torch.Tensor:
+        mmap = self._memmap()
+        scales = None if self._scales is None else self._scales[rows]
+        return self._decode(mmap[rows], self.dtype, scales)
+
+    def _write_rows(
+        self, reps: np.ndarray, n_rows: int, dtype: str, data_file: str, scale_file: str
+    ):
+        """
+        Encodes float32 rows and writes them behind the first n_rows rows of the data files.
+        """
+        rows, scales = self._encode(reps, dtype)
+        row_bytes = self.dim * np.dtype(storage_dtypes[dtype]).itemsize
+        with open(os.path.join(self.path, data_file), "ab") as f:
+            # drop rows of an interrupted append before writing
+            f.truncate(n_rows * row_bytes)
+            f.write(rows.tobytes())
+
+        if scales is not None:
+            with open(os.path.join(self.path, scale_file), "ab") as f:
+                f.truncate(n_rows * scales.itemsize)
+                f.write(scales.tobytes())
+
+    def append(self, names: list, reps, keys: Union[list, None] = None):
+        """
+        Appends representations to the store. Names that are already stored
+        point to the new row afterwards.
+
+        Args:
+            names (list): Names of the representations.
+            reps (list or tensor): Representations as list of 1D tensors or 2D tensor/array.
+            keys (list): Keys of the representations, e.g. sequence hashes. Default None.
+        """
+        if len(names) == 0:
+            return
+
+        if isinstance(reps, (list, tuple)):
+            reps = torch.stack([torch.as_tensor(r).reshape(-1) for r in reps])
+        if isinstance(reps, torch.Tensor):
+            reps = reps.detach().cpu().numpy()
+        reps = reps.reshape(len(names), -1)
+        entries = [self.n_rows + i for i in range(len(names))]
+        self._append(names, reps, entries, keys)
+
+    def _append(self, names: list, rows, entries: list, keys=None):
+        """
+        Writes rows to the data files, then the index entries and keys of names,
+        then the manifest.
+        """
+        rows = np.ascontiguousarray(rows, dtype=np.float32)
+        if self.dim is None:
+            self.dim = rows.shape[1]
+        elif rows.shape[1] != self.dim:
+            raise ValueError(
+                f"Representations of size {rows.shape[1]} do not match store size {self.dim}"
+            )
+
+        os.makedirs(self.path, exist_ok=True)
+        self._write_rows(rows, self.n_rows, self.dtype, self.data_file, self.scale_file)
+        self._write_index(names, entries)
+        self.index.update(zip(names, entries))
+        if keys is not None:
+            self._write_keys(names, keys)
+        else:
+            # an empty key removes the key of a name appended again without key
+            keyed = [name for name in names if name in self.keys]
+            if keyed:
+                self._write_keys(keyed, [""] * len(keyed))
+
+        self.n_rows += len(rows)
+        self._write_meta()
+        self._mmap = None
+
+    def get(
+        self,
+        names: Union[list, None] = None,
+        project: bool = True,
+        chunk_size: int = 65536,
+    ) -> torch.Tensor:
+        """
+        Returns the representations of names as a 2D float32 tensor. Contiguous
+        rows of float32 stores without projection are returned as a view of the
+        memory map without copying, other stores are decoded and projected in
+        chunks of rows.
+
+        Args:
+            names (list): Names to load. Default None loads all representations.
+            project (bool): Apply the projection of the store, if any. Default True.
+            chunk_size (int): Rows decoded at once. Default 65536.
+
+        Returns:
+            torch.Tensor: Representations of shape (len(names), output_dim).
+        """
+        if names is None:
+            names = self.names
+
+        missing = [name for name in names if name not in self.index]
+        if missing:
+            raise KeyError(
+                f"{len(missing)} representations not found in '{self.path}', e.g. '{missing[0]}'"
+            )
+
+        projection = self.projection if project else None
+        dim = self.dim if projection is None else projection.n_components
+        if len(names) == 0:
+            return torch.empty((0, dim or 0))
+
+        rows = np.fromiter((self.index[name] for name in names), dtype=np.int64)
+        start = rows[0]
+        contiguous = rows[-1] - start + 1 == len(rows) and np.all(np.diff(rows) == 1)
+        if contiguous and self.dtype == "float32" and projection is None:
+            mmap = self._memmap()
+            return torch.from_numpy(np.asarray(mmap[start : start + len(rows)]))
+
+        out = torch.empty((len(rows), dim))
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i : i + chunk_size]
+            x = self._read_rows(chunk)
+            out[i : i + len(chunk)] = (
+                x if projection is None else projection.transform(x)
+            )
+        return out
+
+    def set_projection(self, projection: Union[EmbeddingProjection, None]):
+        """
+        Saves a projection that is applied to all loaded representations,
+        None removes the projection. The change is recorded in the manifest, so
+        other store objects pick it up on refresh.
+
+        Args:
+            projection (EmbeddingProjection): fitted projection or None.
+        """
+        path = os.path.join(self.path, self.projection_file)
+        if projection is None:
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            if projection.components.shape[0] != self.dim:
+                raise ValueError(
+                    f"Projection of size {projection.components.shape[0]} does not match store size {self.dim}"
+                )
+            os.makedirs(self.path, exist_ok=True)
+            projection.save(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        self.projection = projection
+        self.projection_version += 1
+        self._write_meta()
+
+    def convert(self, dtype: str, batch_size: int = 65536):
+        """
+        Re-encodes all stored representations to another storage dtype. The
+        converted rows are written to new files of the next generation and
+        switched to by replacing the manifest, so readers never see a partially
+        converted store.
+
+        Args:
+            dtype (str): 'float32', 'float16', 'bfloat16' or 'int8'.
+            batch_size (int): Rows converted at once. Default 65536.
+
+        Returns:
+            EmbeddingStore: the store.
+        """
+        dtype = self._check_dtype(dtype)
+        if dtype == self.dtype:
+            return self
+
+        self.refresh()
+        old_files = [self.data_file, self.scale_file]
+        generation = self.generation + 1
+        data_file = f"embeddings.{generation}.bin"
+        scale_file = f"scales.{generation}.bin"
+
+        for i in range(0, self.n_rows, batch_size):
+            rows = np.arange(i, min(i + batch_size, self.n_rows))
+            x = self._read_rows(rows).numpy()
+            self._write_rows(x, i, dtype, data_file, scale_file)
+
+        self.dtype, self.data_file, self.scale_file = dtype, data_file, scale_file
+        self.generation = generation
+        self._mmap, self._scales = None, None
+        self._write_meta()
+
+        for f in old_files:
+            if f not in (data_file, scale_file) and os.path.exists(
+                os.path.join(self.path, f)
+            ):
+                os.remove(os.path.join(self.path, f))
+        return self
+
+    def migrate(self, remove: bool = False, batch_size: int = 1000) -> int:
+        """
+        Moves representations saved as one '.pt' file per protein in the store
+        directory into the store.
+
+        Args:
+            remove (bool): Delete the '.pt' files after migration. Default False.
+            batch_size (int): Number of files loaded per append. Default 1000.
+
+        Returns:
+            int: Number of migrated representations.
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        files = sorted(
+            f
+            for f in os.listdir(self.path)
+            if f.endswith(".pt") and f[:-3] not in self.index
+        )
+        for i in range(0, len(files), batch_size):
+            batch = files[i : i + batch_size]
+            reps = [
+                torch.load(os.path.join(self.path, f), map_location="cpu")
+                for f in batch
+            ]
+            self.append([f[:-3] for f in batch], reps)
+
+        if remove:
+            for f in files:
+                os.remove(os.path.join(self.path, f))
+
+        return len(files)
+
+
+class ResidueStore(EmbeddingStore):
+    """
+    Appendable, memory-mapped store for per-residue representations of sequences
+    of different lengths. The residue rows of all sequences are appended to one
+    matrix and the index maps every name to its first row and its length, so a
+    sequence is read as one contiguous slice. Storage dtypes, projections and
+    the migration of '.pt' files (one (length, dim) tensor per protein) work as
+    in the EmbeddingStore.
+
+    Args:
+        path (str): Directory of the store, e.g. 'rep/esm2/layer33_per_residue'.
+        dim (int): Size of the residue representations. Inferred on the first append if None.
+        dtype (str): Storage dtype of new stores. Default 'float32'.
+
+    Example:
+        store = ResidueStore('rep/esm2/layer33_per_residue')
+        store.append(['seq1', 'seq2'], [x1, x2])
+        x1, x2 = store.get(['seq1', 'seq2'])
+    """
+
+    layout = "residue"
+
+    @staticmethod
+    def _parse_index_line(line: str) -> tuple:
+        name, start, length = line.rsplit("\t", 2)
+        start, length = int(start), int(length)
+        return name, (start, length), start + length
+
+    @staticmethod
+    def _format_index_line(name: str, entry) -> str:
+        start, length = entry
+        return f"{name}\t{start}\t{length}\n"
+
+    def append(self, names: list, reps: list, keys: Union[list, None] = None):
+        """
+        Appends per-residue representations to the store.
+
+        Args:
+            names (list): Names of the representations.
+            reps (list): Representations as list of 2D tensors of shape (length, dim).
+            keys (list): Keys of the representations, e.g. sequence hashes. Default None.
+        """
+        if len(names) == 0:
+            return
+
+        reps = [torch.as_tensor(r).detach().cpu().float() for r in reps]
+        entries, start = [], self.n_rows
+        for r in reps:
+            entries.append((start, len(r)))
+            start += len(r)
+        self._append(names, torch.cat(reps).numpy(), entries, keys)
+
+    def get(self, names: Union[list, None] = None, project: bool = True) -> list:
+        """
+        Returns the per-residue representations of names.
+
+        Args:
+            names (list): Names to load. Default None loads all representations.
+            project (bool): Apply the projection of the store, if any. Default True.
+
+        Returns:
+            list: float32 tensors of shape (length, output_dim), one per name.
+        """
+        if names is None:
+            names = self.names
+
+        missing = [name for name in names if name not in self.index]
+        if missing:
+            raise KeyError(
+                f"{len(missing)} representations not found in '{self.path}', e.g. '{missing[0]}'"
+            )
+
+        reps = []
+        for name in names:
+            start, length = self.index[name]
+            x = self._read_rows(np.arange(start, start + length))
+            if project and self.projection is not None:
+                x = self.projection.transform(x)
+            reps.append(x)
+        return reps
+
+
+def open_embedding_store(path: str) -> EmbeddingStore:
+    """
+    Opens the embedding store in path, as ResidueStore if its meta data records
+    the residue layout. Directories that only contain '.pt' representation files
+    are migrated into a new store.
+
+    Args:
+        path (str): Directory of representations.
+
+    Returns:
+        EmbeddingStore: the store.
+    """
+    if not EmbeddingStore.exists(path):
+        store = EmbeddingStore(path)
+        store.migrate()
+        return store
+
+    if EmbeddingStore.layout_of(path) == ResidueStore.layout:
+        return ResidueStore(path)
+    return EmbeddingStore(path)
@@ -5,10 +5,10 @@ __name__ = "proteusAI"
 __author__ = "Jonathan Funk and Laura Sofia Machado"
 
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr
 
 
-def greedy(mean, std=None, current_best=None, xi=None):
+def greedy(mean, std=None, current_best=None, xi=None, out=None):
     """
     Greedy acquisition function.
 
@@ -17,14 +17,19 @@ def greedy(mean, std=None, current_best=None, xi=None):
         std (np.array, optional): This is the standard deviation function from the GP over the considered set of points. Default is None.
         current_best (float, optional): This is the current maximum of the unknown function: mu^+. Default is None.
         xi (float, optional): Small value added to avoid corner cases. Default is None.
+        out (np.array, optional): Preallocated array to write the values to. Default is None.
 
     Returns:
         np.array: The mean values for all the points, as greedy acquisition selects the best based on mean.
     """
-    return mean
+    if out is None:
+        return mean
 
+    np.copyto(out, mean, casting="same_kind")
+    return out
 
-def EI(mean, std, current_best, xi=0.1):
+
+def EI(mean, std, current_best, xi=0.1, out=None):
     """
     Expected Improvement acquisition function.
 
@@ -43,19 +48,38 @@ def EI(mean, std, current_best, xi=0.1):
         std (np.array): This is the standard deviation function from the GP over the considered set of points.
         current_best (float): This is the current maximum of the unknown function: mu^+.
         xi (float): Small value added to avoid corner cases.
+        out (np.array, optional): Preallocated array to write the values to. Default is None.
 
     Returns:
-        np.array: The value of this acquisition function for all the points.
+        np.array: The value of this acquisition function for all the points. float32
+            inputs are evaluated in float32.
     """
+    mean, std = np.asarray(mean), np.asarray(std)
+    if out is None:
+        out = np.empty(mean.shape, dtype=np.result_type(mean, std, np.float32))
+
+    # two temporaries: the improvement, which is reused for the PDF, and Z
+    improvement = np.subtract(mean, current_best + xi, dtype=out.dtype)
+    Z = np.add(std, 1e-9, dtype=out.dtype)
+    np.divide(improvement, Z, out=Z)
+
+    ndtr(Z, out=out)
+    out *= improvement
 
-    Z = (mean - current_best - xi) / (std + 1e-9)
-    EI = (mean - current_best - xi) * norm.cdf(Z) + std * norm.pdf(Z)
-    EI[std == 0] = 0
+    pdf = improvement
+    np.square(Z, out=pdf)
+    pdf *= -0.5
+    np.exp(pdf, out=pdf)
+    pdf *= 1 / np.sqrt(2 * np.pi)
+    pdf *= std
+    out += pdf
 
-    return EI
+    np.copyto(out, 0, where=std == 0)
 
+    return out
 
-def UCB(mean, std, current_best=None, kappa=1.5):
+
+def UCB(mean, std, current_best=None, kappa=1.5, out=None):
     """
     Upper-Confidence Bound acquisition function.
 
@@ -64,14 +88,20 @@ def UCB(mean, std, current_best=None, kappa=1.5):
         std (np.array): This is the standard deviation function from the GP over the considered set of points.
         current_best (float, optional): This is the current maximum of the unknown function: mu^+. Default is None.
         kappa (float): Exploration-exploitation trade-off parameter. The higher the value, the more exploration. Default is 0.
+        out (np.array, optional): Preallocated array to write the values to. Default is None.
 
     Returns:
         np.array: The value of this acquisition function for all the points.
     """
-    return mean + kappa * std
+    if out is None:
+        return mean + kappa * std
+
+    np.multiply(std, kappa, out=out, casting="same_kind")
+    out += mean
+    return out
 
 
-def random_acquisition(mean, std=None, current_best=None, xi=None):
+def random_acquisition(mean, std=None, current_best=None, xi=None, out=None):
     """
     Random acquisition function. Assigns random acquisition values to all points in the unobserved set.
 
@@ -80,6 +110,7 @@ def random_acquisition(mean, std=None, current_best=None, xi=None):
         std (np.array, optional): This is the standard deviation function from the GP over the considered set of points. Default is None.
         current_best (float, optional): This is the current maximum of the unknown function: mu^+. Default is None.
         xi (float, optional): Small value added to avoid corner cases. Default is None.
+        out (np.array, optional): Preallocated array to write the values to. Default is None.
 
     Returns:
         np.array: Random acquisition values for all points in the unobserved set.
@@ -87,4 +118,167 @@ def random_acquisition(mean, std=None, current_best=None, xi=None):
     n_unobserved = len(mean)
     np.random.seed(None)
     random_acq_values = np.random.random(n_unobserved)
-    return random_acq_values
+    if out is None:
+        return random_acq_values
+
+    np.copyto(out, random_acq_values, casting="same_kind")
+    return out
+
+
+acq_fns = {
+    "greedy": greedy,
+    "ei": EI,
+    "ucb": UCB,
+    "random": random_acquisition,
+}
+
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores, ordered from highest to lowest. Only the top k
+    are sorted after a partial partition, instead of sorting all scores.
+
+    Args:
+        scores (np.array): Acquisition scores.
+        k (int): Number of indices to return.
+
+    Returns:
+        np.array: Indices of the k highest scores.
+    """
+    scores = np.asarray(scores)
+    if k >= len(scores):
+        return np.argsort(scores)[::-1]
+
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    top = np.argpartition(scores, -k)[-k:]
+
+    return top[np.argsort(scores[top])[::-1]]
+
+
+def kriging_believer(mean, cov, q, current_best, acq_fn=EI, noise=0.0):
+    """
+    Greedy batch acquisition with the kriging believer heuristic. After each pick,
+    the GP is conditioned on its own mean at the picked point. This leaves the
+    mean unchanged, raises the current best to the believed value and shrinks the
+    variances of correlated candidates by a rank-1 update of the posterior
+    covariance, so no refits are needed.
+
+    Args:
+        mean (np.array): Posterior mean over the candidates.
+        cov (np.array): Posterior covariance of the latent function over the candidates.
+        q (int): Batch size.
+        current_best (float): This is the current maximum of the unknown function: mu^+.
+        acq_fn (function): Single point acquisition function, e.g. EI, UCB or greedy. Default EI.
+        noise (float): Observation noise variance of the GP. Default 0.
+
+    Returns:
+        tuple: np.array of the selected indices in the order of selection and their
+            acquisition values when they were selected.
+    """
+    mean, cov = np.asarray(mean), np.asarray(cov)
+    n = len(mean)
+    q = min(q, n)
+
+    var = np.diag(cov).copy()
+    factors = np.empty((q, n), dtype=cov.dtype)
+    selected = np.empty(q, dtype=np.intp)
+    scores = np.empty(q, dtype=cov.dtype)
+    score = np.empty(n, dtype=np.result_type(mean, cov, np.float32))
+    std = np.empty_like(var)
+
+    for t in range(q):
+        np.maximum(var, 0, out=std)
+        std += noise
+        np.sqrt(std, out=std)
+        acq_fn(mean, std, current_best, out=score)
+        score[selected[:t]] = -np.inf
+
+        j = int(np.argmax(score))
+        selected[t] = j
+        scores[t] = score[j]
+
+        # covariance with the picked point after the previous updates
+        c = cov[:, j] - factors[:t, j] @ factors[:t]
+        c /= np.sqrt(max(c[j] + noise, 1e-12))
+        factors[t] = c
+        var -= c**2
+        current_best = max(current_best, mean[j])
+
+    return selected, scores
+
+
+def qEI(mean, cov, q, current_best, xi=0.1, n_samples=512, seed=None):
+    """
+    Greedy sequential Monte Carlo q-Expected Improvement. Joint samples of the
+    posterior over all candidates are drawn once. The batch grows one point at a
+    time, by the candidate x that maximizes
+
+        qEI(S + x) = E[max(max_{i in S + x} f_i - mu^+ - xi, 0)]
+
+    estimated on the same samples, so each step is a single pass over the samples.
+
+    Args:
+        mean (np.array): Posterior mean over the candidates.
+        cov (np.array): Posterior covariance of the latent function over the candidates.
+        q (int): Batch size.
+        current_best (float): This is the current maximum of the unknown function: mu^+.
+        xi (float): Small value added to avoid corner cases.
+        n_samples (int): Number of Monte Carlo samples. Default 512.
+        seed (int): Random seed for the samples. Default None.
+
+    Returns:
+        tuple: np.array of the selected indices in the order of selection and the
+            qEI of the batch up to each selected point.
+    """
+    mean, cov = np.asarray(mean), np.asarray(cov)
+    n = len(mean)
+    q = min(q, n)
+
+    rng = np.random.default_rng(seed)
+    samples = rng.standard_normal((n_samples, n)).astype(cov.dtype)
+    samples = samples @ _psd_sqrt(cov).T
+    samples += mean
+
+    threshold = current_best + xi
+    batch_max = np.full((n_samples, 1), threshold, dtype=samples.dtype)
+    selected = np.empty(q, dtype=np.intp)
+    scores = np.empty(q, dtype=samples.dtype)
+    work = np.empty_like(samples)
+
+    for t in range(q):
+        np.maximum(samples, batch_max, out=work)
+        score = work.mean(axis=0)
+        score -= threshold
+        score[selected[:t]] = -np.inf
+
+        j = int(np.argmax(score))
+        selected[t] = j
+        scores[t] = score[j]
+        np.maximum(batch_max[:, 0], samples[:, j], out=batch_max[:, 0])
+
+    return selected, scores
+
+
+def _psd_sqrt(cov):
+    """
+    Square-root factor L with cov = L L^T: the lower triangular Cholesky factor,
+    with jitter added to the diagonal if needed, or else a factor from an
+    eigendecomposition with clipped eigenvalues.
+    """
+    scale = max(float(np.mean(np.diag(cov))), 1e-12)
+    for jitter in (0, 1e-6, 1e-4, 1e-2):
+        try:
+            return np.linalg.cholesky(cov + jitter * scale * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            continue
+
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    return eigvecs * np.sqrt(np.clip(eigvals, 0, None))
+
+
+batch_acq_fns = {
+    "qei": qEI,
+    "kb": kriging_believer,
+}
@@ -7,32 +7,68 @@ import random
 #####################################
 
 
-def precompute_distances(vectors):
-    """Precompute the pairwise Euclidean distance matrix."""
-    num_vectors = len(vectors)
-    distance_matrix = np.zeros((num_vectors, num_vectors))
+def _as_matrix(vectors):
+    """Stack vectors (numpy arrays or tensors) into a 2D float32 array with one flattened row per vector."""
+    if hasattr(vectors, "cpu"):
+        vectors = vectors.cpu().numpy()
+    elif not isinstance(vectors, np.ndarray):
+        vectors = np.stack(
+            [np.asarray(v.cpu() if hasattr(v, "cpu") else v) for v in vectors]
+        )
+
+    return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+
+
+def pairwise_distances(a, b=None, block_size=2048):
+    """
+    Pairwise Euclidean distances between the rows of a and b, computed in blocks of
+    block_size rows from squared norms and a matrix product.
+
+    Args:
+        a (np.array): 2D array.
+        b (np.array): 2D array. Default None (distances within a).
+        block_size (int): Number of rows of a per block. Default 2048.
+
+    Returns:
+        np.array: Distance matrix of shape (len(a), len(b)).
+    """
+    b = a if b is None else b
+    b_sq = np.einsum("ij,ij->i", b, b)
+    distances = np.empty((len(a), len(b)), dtype=np.result_type(a, b))
+
+    for i in range(0, len(a), block_size):
+        block = distances[i : i + block_size]
+        a_block = a[i : i + block_size]
+        np.matmul(a_block, b.T, out=block)
+        block *= -2
+        block += np.einsum("ij,ij->i", a_block, a_block)[:, None]
+        block += b_sq
+        np.maximum(block, 0, out=block)
+        np.sqrt(block, out=block)
+
+    if b is a:
+        np.fill_diagonal(distances, 0)
 
-    for i in range(num_vectors):
-        for j in range(i + 1, num_vectors):
-            dist = np.linalg.norm(vectors[i] - vectors[j])
-            distance_matrix[i, j] = dist
-            distance_matrix[j, i] = dist
+    return distances
 
-    return distance_matrix
+
+def precompute_distances(vectors):
+    """Precompute the pairwise Euclidean distance matrix."""
+    return pairwise_distances(_as_matrix(vectors))
 
 
 def diversity_score_incremental(
     current_score, selected_indices, idx_in, idx_out, distance_matrix
 ):
     """Update the diversity score incrementally when a vector is swapped."""
-    new_score = current_score
+    selected_indices = np.asarray(selected_indices)
+    selected_indices = selected_indices[selected_indices != idx_out]
 
-    for idx in selected_indices:
-        if idx != idx_out:
-            new_score -= distance_matrix[idx_out, idx]
-            new_score += distance_matrix[idx_in, idx]
-
-    return new_score
+    return (
+        current_score
+        - distance_matrix[idx_out, selected_indices].sum()
+        + distance_matrix[idx_in, selected_indices].sum()
+    )
 
 
 def simulated_annealing(
@@ -46,6 +82,10 @@ def simulated_annealing(
     """
     Simulated Annealing to select N vectors that maximize diversity.
 
+    The distances of a swapped vector to the current selection are computed on the
+    fly, so memory scales with N instead of the squared number of vectors. Selected
+    and unselected vectors are kept in index arrays for constant time swaps.
+
     Args:
         vectors (list): List of numpy arrays.
         N (int): Number of sequences that should be sampled.
@@ -56,53 +96,50 @@ def simulated_annealing(
     Returns:
         list: Indices of diverse vectors.
     """
-
-    if pbar:
-        pbar.set(message="Computing distance matrix", detail="...")
-
-    # Precompute all pairwise distances
-    distance_matrix = precompute_distances(vectors)
+    X = _as_matrix(vectors)
+    n = len(X)
+    if N >= n:
+        return list(range(n)), float(pairwise_distances(X).sum() / 2)
 
     # Randomly initialize the selection of N vectors
-    selected_indices = random.sample(range(len(vectors)), N)
-    current_score = sum(
-        distance_matrix[i, j]
-        for i in selected_indices
-        for j in selected_indices
-        if i < j
-    )
+    order = np.array(random.sample(range(n), n))
+    selected, unselected = order[:N], order[N:]
+
+    # summed distance of every selected vector to the selection
+    contributions = pairwise_distances(X[selected]).sum(axis=1)
+    current_score = contributions.sum() / 2
 
     temperature = initial_temperature
     best_score = current_score
-    best_selection = selected_indices[:]
+    best_selection = selected.copy()
+    update_every = max(max_iterations // 100, 1)
 
     for iteration in range(max_iterations):
-
-        if pbar:
+        if pbar and iteration % update_every == 0:
             pbar.set(iteration, message="Minimizing energy", detail="...")
 
         # Randomly select a vector to swap
-        idx_out = random.choice(selected_indices)
-        idx_in = random.choice(
-            [i for i in range(len(vectors)) if i not in selected_indices]
-        )
+        i = random.randrange(N)
+        j = random.randrange(n - N)
+        idx_out, idx_in = selected[i], unselected[j]
 
         # Incrementally update the diversity score
-        new_score = diversity_score_incremental(
-            current_score, selected_indices, idx_in, idx_out, distance_matrix
-        )
+        d_in = pairwise_distances(X[idx_in][None], X[selected])[0]
+        new_score = current_score + d_in.sum() - d_in[i] - contributions[i]
 
         # Decide whether to accept the new solution
         delta = new_score - current_score
         if delta > 0 or np.exp(delta / temperature) > random.random():
-            selected_indices.remove(idx_out)
-            selected_indices.append(idx_in)
+            d_out = pairwise_distances(X[idx_out][None], X[selected])[0]
+            contributions += d_in - d_out
+            contributions[i] = d_in.sum() - d_in[i]
+            selected[i], unselected[j] = idx_in, idx_out
             current_score = new_score
 
             # Update the best solution found so far
             if new_score > best_score:
                 best_score = new_score
-                best_selection = selected_indices[:]
+                best_selection = selected.copy()
 
         # Cool down the temperature
         temperature *= 1 - cooling_rate
@@ -111,7 +148,43 @@ def simulated_annealing(
         # if temperature < 1e-8:
         #    break
 
-    return best_selection, best_score
+    return best_selection.tolist(), float(best_score)
+
+
+def k_center_greedy(vectors, N, pbar=None):
+    """
+    Greedy max-min (k-center) selection of N diverse vectors. Starting from a random
+    vector, the vector farthest from the current selection is added until N are
+    selected. Only the distances to the last selected vector are computed in each
+    step, so no distance matrix is built.
+
+    Args:
+        vectors (list): List of numpy arrays.
+        N (int): Number of sequences that should be sampled.
+
+    Returns:
+        list: Indices of diverse vectors.
+    """
+    X = _as_matrix(vectors)
+    n = len(X)
+    N = min(N, n)
+
+    selected = [random.randrange(n)] if N > 0 else []
+    min_distances = np.full(n, np.inf, dtype=X.dtype)
+    update_every = max(N // 100, 1)
+
+    for step in range(1, N):
+        if pbar and step % update_every == 0:
+            pbar.set(step, message="Selecting diverse sequences", detail="...")
+
+        d = pairwise_distances(X, X[selected[-1]][None])[:, 0]
+        np.minimum(min_distances, d, out=min_distances)
+        min_distances[selected[-1]] = -1
+        selected.append(int(np.argmax(min_distances)))
+
+    diversity = pairwise_distances(X[selected]).sum() / 2
+
+    return selected, float(diversity)
 
 
 #######################################
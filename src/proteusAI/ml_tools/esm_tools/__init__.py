@@ -8,4 +8,4 @@ A subpackage for protein language activity_prediction
 __name__ = "proteusAI"
 __author__ = "Jonathan Funk"
 
-from proteusAI.ml_tools.esm_tools import *  # noqa: F403
+from proteusAI.ml_tools.esm_tools.esm_tools import *  # noqa: F403
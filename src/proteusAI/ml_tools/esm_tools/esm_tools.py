@@ -10,11 +10,16 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent.parent))
 
+import hashlib
 import math
 import os
+import queue
 import shutil
 import tempfile
+import threading
 import typing as T
+from collections import OrderedDict
+from collections.abc import Sequence
 from typing import Union
 
 import esm
@@ -36,16 +41,290 @@ from esm.inverse_folding.multichain_util import (
 )
 from esm.inverse_folding.util import CoordBatchConverter
 from matplotlib.colors import LinearSegmentedColormap
+from scipy.stats import pearsonr, spearmanr
+
+from proteusAI.io_tools.fasta import load_fasta
+from proteusAI.io_tools.embeddings import EmbeddingStore, ResidueStore, sequence_hash
 
 alphabet = torch.load(os.path.join(Path(__file__).parent, "alphabet.pt"))
 
+canonical_aas = list("ARNDCQEGHILKMFPSTWYV")
+
+# Names of the pretrained checkpoints in esm.pretrained
+pretrained_models = {
+    "esm2": "esm2_t33_650M_UR50D",
+    "esm1v": "esm1v_t33_650M_UR90S",
+}
+
+
+def _resolve_device(device=None):
+    """
+    Resolve a device argument to a torch.device, autoselecting cuda if available.
+    """
+    if device is None:
+        return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    return torch.device(device)
+
+
+def _resolve_dtype(dtype=None):
+    """
+    Resolve a dtype argument ('float16', torch.float16, None, ...) to a torch.dtype.
+    """
+    if dtype is None:
+        return torch.float32
+    if isinstance(dtype, str):
+        dtype = getattr(torch, dtype, None)
+    if not isinstance(dtype, torch.dtype):
+        raise TypeError(f"{dtype} is not a valid torch dtype")
+    return dtype
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of pretrained ESM models.
+
+    Models are keyed by model name, device and dtype. Loading a model that is
+    already registered returns the cached weights instead of reading the
+    checkpoint again. If a memory budget is set, the least recently used
+    models are evicted once the budget is exceeded.
+
+    Attributes:
+        max_memory (int): Memory budget for the weights of all loaded models in bytes.
+            Default None (no limit).
+
+    Example:
+        model, alphabet = model_registry.load("esm2", device="cpu")
+        model_registry.unload("esm2")
+    """
+
+    def __init__(self, max_memory: Union[int, None] = None):
+        self.max_memory = max_memory
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(name: str, device=None, dtype=None):
+        return (name, str(_resolve_device(device)), str(_resolve_dtype(dtype)))
+
+    @staticmethod
+    def _nbytes(model: torch.nn.Module):
+        """
+        Memory occupied by the parameters and buffers of a model in bytes.
+        """
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def load(self, name: str, device=None, dtype=None):
+        """
+        Return a pretrained model and its alphabet, loading it if necessary.
+
+        Args:
+            name (str): choose either esm2 or esm1v.
+            device (str): Choose hardware for computation. Default 'None' for autoselection
+                          other options are 'cpu' and 'cuda'.
+            dtype (str or torch.dtype): Precision of the weights. Default None (float32).
+
+        Returns:
+            tuple: model (torch.nn.Module) in eval mode and alphabet (esm.data.Alphabet)
+        """
+        if name not in pretrained_models:
+            raise ValueError(f"{name} is not a valid model")
+
+        key = self._key(name, device, dtype)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._evict()
+                model, model_alphabet, _ = self._models[key]
+                return model, model_alphabet
+
+            model, model_alphabet = getattr(esm.pretrained, pretrained_models[name])()
+            model = model.eval().to(
+                device=_resolve_device(device), dtype=_resolve_dtype(dtype)
+            )
+            self._models[key] = (model, model_alphabet, self._nbytes(model))
+            self._evict()
+
+            return model, model_alphabet
+
+    def unload(self, name: Union[str, None] = None, device=None, dtype=None):
+        """
+        Remove models from the registry. Unloads every model if name is None, and
+        every device and dtype of a model if device or dtype are None.
+
+        Args:
+            name (str): name of the model.
+            device (str): device of the model.
+            dtype (str or torch.dtype): dtype of the model.
+        """
+        with self._lock:
+            for key in list(self._models.keys()):
+                if name is not None and key[0] != name:
+                    continue
+                if device is not None and key[1] != str(torch.device(device)):
+                    continue
+                if dtype is not None and key[2] != str(_resolve_dtype(dtype)):
+                    continue
+                del self._models[key]
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def memory_usage(self):
+        """
+        Memory occupied by all registered models in bytes.
+        """
+        with self._lock:
+            return sum(nbytes for _, _, nbytes in self._models.values())
+
+    def _evict(self):
+        """
+        Evict least recently used models until the memory budget is met. The most
+        recently used model is always kept.
+        """
+        if self.max_memory is None:
+            return
+        while len(self._models) > 1 and self.memory_usage() > self.max_memory:
+            self._models.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def __len__(self):
+        with self._lock:
+            return len(self._models)
+
+
+model_registry = ModelRegistry()
+
+
+class ZeroShotCache:
+    """
+    Content-addressed on-disk cache of zero-shot results. Entries are keyed by a
+    hash of the sequence, model, model weights and scoring mode and hold p, mmp,
+    entropy and logits in one file, so the cache can be shared by all users and
+    projects on a host. The least recently used entries are removed once the cache
+    grows beyond max_size bytes.
+
+    Args:
+        path (str): cache directory. Default '$PROTEUSAI_CACHE_DIR/zero_shot' or
+            '~/.cache/proteusAI/zero_shot'.
+        max_size (int): maximum size of the cache in bytes. Default 1 GB.
+
+    Example:
+        key = zs_cache.key(seq, 'esm2')
+        results = zs_cache.get(key)
+    """
+
+    def __init__(self, path: Union[str, None] = None, max_size: int = 1024**3):
+        if path is None:
+            root = os.environ.get(
+                "PROTEUSAI_CACHE_DIR",
+                os.path.join(os.path.expanduser("~"), ".cache", "proteusAI"),
+            )
+            path = os.path.join(root, "zero_shot")
+        self.path = path
+        self.max_size = max_size
+
+    def key(
+        self,
+        seq: str,
+        model: str,
+        mode: str = "masked_marginal",
+        mask_k: Union[int, None] = None,
+    ) -> str:
+        """
+        Returns the cache key of a zero-shot computation.
+        """
+        weights = pretrained_models.get(model, model)
+        if mode == "multi_mask":
+            mode = f"{mode}_{mask_k}"
+        content = "\n".join([seq, model, weights, mode])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + ".pt")
+
+    def get(self, key: str) -> Union[dict, None]:
+        """
+        Returns the cached results (dict with seq, p, mmp, entropy, logits) or None.
+        """
+        f = self._file(key)
+        try:
+            results = torch.load(f, map_location="cpu")
+            os.utime(f)  # mark as recently used
+        except (FileNotFoundError, EOFError, RuntimeError):
+            return None
+        return results
+
+    def put(self, key: str, **results):
+        """
+        Stores results under key and evicts old entries if the cache is too large.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        os.close(fd)
+        torch.save(results, tmp_file)
+        os.replace(tmp_file, self._file(key))
+        self._evict()
+
+    def size(self) -> int:
+        """
+        Returns the size of the cache in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        """
+        Removes all cached results.
+        """
+        for f, _, _ in self._entries():
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self):
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        for f in os.listdir(self.path):
+            if not f.endswith(".pt"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, f))
+            except FileNotFoundError:
+                continue
+            entries.append((os.path.join(self.path, f), stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for f, size, _ in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+zs_cache = ZeroShotCache()
+
 
 def esm_compute(
     seqs: list,
     names: list = None,
     model: Union[str, torch.nn.Module] = "esm1v",
-    rep_layer: int = 33,
+    rep_layer: Union[int, list] = 33,
     device=None,
+    dtype=None,
+    alphabet=None,
+    return_contacts: bool = False,
+    need_head_weights: bool = False,
 ):
     """
     Compute the of esm_tools models for a list of sequences.
@@ -55,9 +334,14 @@ def esm_compute(
         names (list, default None): list of names/labels for protein sequences.
             If None sequences will be named seq1, seq2, ...
         model (str, torch.nn.Module): choose either esm2, esm1v or a pretrained model object.
-        rep_layer (int): choose representation layer. Default 33.
+            Pretrained models are loaded once and cached in the model_registry.
+        rep_layer (int or list): choose representation layer(s). Default 33.
         device (str): Choose hardware for computation. Default 'None' for autoselection
                           other options are 'cpu' and 'cuda'.
+        dtype (str or torch.dtype): Precision of pretrained model weights. Default None (float32).
+        alphabet (esm.data.Alphabet): Alphabet of a model object. Default None (ESM-1b alphabet).
+        return_contacts (bool): Predict contacts from the attention maps. Default False.
+        need_head_weights (bool): Return the attention maps of all layers and heads. Default False.
 
     Returns: representations (list) of sequence representation, batch lens and batch labels
 
@@ -66,10 +350,7 @@ def esm_compute(
         results, batch_lens, batch_labels = esm_compute(seqs)
     """
     # detect device
-    if device is None:
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    else:
-        device = torch.device(device)
+    device = _resolve_device(device)
 
     # on M1 if mps available
     # if device == torch.device(type='cpu'):
@@ -77,14 +358,10 @@ def esm_compute(
 
     # load model
     if isinstance(model, str):
-        if model == "esm2":
-            model, alphabet = esm.pretrained.esm2_t33_650M_UR50D()
-        elif model == "esm1v":
-            model, alphabet = esm.pretrained.esm1v_t33_650M_UR90S()
-        else:
-            raise ValueError(f"{model} is not a valid model")
+        model, alphabet = model_registry.load(model, device=device, dtype=dtype)
     elif isinstance(model, torch.nn.Module):
-        alphabet = torch.load(os.path.join(Path(__file__).parent, "alphabet.pt"))
+        if alphabet is None:
+            alphabet = esm.data.Alphabet.from_architecture("ESM-1b")
     else:
         raise TypeError("Model should be either a string or a torch.nn.Module object")
 
@@ -106,27 +383,62 @@ def esm_compute(
     batch_labels, batch_strs, batch_tokens = batch_converter(data)
     batch_lens = (batch_tokens != alphabet.padding_idx).sum(1)
 
-    # Extract per-residue representations (on CPU)
+    repr_layers = [rep_layer] if isinstance(rep_layer, int) else list(rep_layer)
+
+    # Extract per-residue representations, contacts and attention maps only if requested
     with torch.no_grad():
         results = model(
-            batch_tokens.to(device), repr_layers=[rep_layer], return_contacts=True
+            batch_tokens.to(device),
+            repr_layers=repr_layers,
+            need_head_weights=need_head_weights,
+            return_contacts=return_contacts,
         )
 
     return results, batch_lens, batch_labels, alphabet
 
 
-def get_seq_rep(results, batch_lens):
+# Pooling strategies of get_seq_rep
+poolings = ["mean", "bos", "attention", "per_residue"]
+
+
+def get_seq_rep(results, batch_lens, rep_layer: int = 33, pooling: str = "mean"):
     """
-    Get sequence representations from esm_compute
+    Get sequence representations from esm_compute.
+
+    Args:
+        results (dict): output of esm_compute.
+        batch_lens (torch.Tensor): number of tokens per sequence, including start and end token.
+        rep_layer (int): representation layer. Default 33.
+        pooling (str): 'mean' averages the residue representations, 'bos' returns the
+            start token representation, 'attention' weights residues by the attention they
+            receive in the last layer (requires need_head_weights in esm_compute) and
+            'per_residue' returns the (length, dim) residue representations. Default 'mean'.
+
+    Returns:
+        list: one representation per sequence.
     """
-    token_representations = results["representations"][33]
+    if pooling not in poolings:
+        raise ValueError(
+            f"'{pooling}' is not a supported pooling. Choose from {poolings}"
+        )
+
+    token_representations = results["representations"][rep_layer]
 
-    # Generate per-sequence representations via averaging
     sequence_representations = []
     for i, tokens_len in enumerate(batch_lens):
-        sequence_representations.append(
-            token_representations[i, 1 : tokens_len - 1].mean(0)
-        )
+        residues = token_representations[i, 1 : tokens_len - 1]
+        if pooling == "mean":
+            sequence_representations.append(residues.mean(0))
+        elif pooling == "bos":
+            sequence_representations.append(token_representations[i, 0])
+        elif pooling == "attention":
+            # attention received by every residue, averaged over heads and queries
+            attn = results["attentions"][i, -1].mean(0)[:tokens_len, 1 : tokens_len - 1]
+            weights = attn.mean(0)
+            weights = weights / weights.sum()
+            sequence_representations.append(weights @ residues)
+        else:
+            sequence_representations.append(residues)
 
     return sequence_representations
 
@@ -141,7 +453,7 @@ def get_logits(results):
 
 def get_attentions(results):
     """
-    Get attentions from esm_compute
+    Get attentions from esm_compute (computed with need_head_weights=True)
     """
     attn = results["attentions"]
     return attn
@@ -168,6 +480,46 @@ def per_position_entropy(probability_distribution):
     return entropy
 
 
+def length_sorted_batches(
+    seqs: list, max_tokens_per_batch: int = 1024
+) -> T.Generator[T.List[int], None, None]:
+    """
+    Group sequences of similar length into batches under a token budget.
+
+    Sequences are sorted by length, longest first, so that every batch is padded to a
+    length close to the length of its members. Batches are packed until the padded
+    batch (number of sequences times the longest sequence, including start and end
+    tokens) would exceed max_tokens_per_batch. A sequence that exceeds the budget on
+    its own forms a batch of one.
+
+    Args:
+        seqs (list): protein sequences.
+        max_tokens_per_batch (int): maximum number of (padded) tokens per batch. Default 1024.
+
+    Returns:
+        generator: lists of indices into seqs, one list per batch.
+
+    Example:
+        seqs = ["AGAVCTGAKLI", "AG", "AGHRFLIKLKI"]
+        list(length_sorted_batches(seqs, max_tokens_per_batch=30))
+        [[0, 2], [1]]
+    """
+    order = sorted(range(len(seqs)), key=lambda i: len(seqs[i]), reverse=True)
+
+    batch, padded_length = [], 0
+    for i in order:
+        # sequences arrive longest first, so the first member sets the padded length
+        if not batch:
+            padded_length = len(seqs[i]) + 2
+        if batch and (len(batch) + 1) * padded_length > max_tokens_per_batch:
+            yield batch
+            batch, padded_length = [], len(seqs[i]) + 2
+        batch.append(i)
+
+    if batch:
+        yield batch
+
+
 def batch_compute(
     seqs: list = None,
     names: list = None,
@@ -175,26 +527,62 @@ def batch_compute(
     dest: str = None,
     model: str = "esm2",
     batch_size: int = 10,
-    rep_layer: int = 33,
+    rep_layer: Union[int, list] = 33,
     pbar=None,
     device=None,
+    dtype=None,
+    max_tokens_per_batch: Union[int, None] = None,
+    storage_dtype: str = "float32",
+    pooling: Union[str, list] = "mean",
+    n_workers: Union[int, None] = None,
+    threads_per_worker: Union[int, None] = None,
+    max_length: Union[int, None] = 1022,
 ):
     """
     Computes and saves sequence representations in batches using esm2 or esm1v.
 
+    Jobs that save to dest can be resumed: sequences whose representations are already
+    stored are skipped, and the store only commits complete batches. Sequences with
+    characters outside the model alphabet or longer than max_length are skipped
+    before computation. Batches that fail are split in halves until the failing
+    sequences are isolated and skipped. Skipped sequences and the reason are
+    printed and written to dest/skipped.tsv. Identical sequences are computed once,
+    names of duplicates are linked to the stored representation, also across jobs.
+
     Args:
         seqs (list): protein sequences either as str or biotite.sequence.ProteinSequence
         names (list, default None): list of names/labels for protein sequences
         fasta_path (str): path to fasta file.
-        dest (str): destination where embeddings are saved. Default None (won't save if dest is None).
+        dest (str): directory of the embedding store the representations are appended to.
+            Default None (won't save if dest is None). If several layers or poolings are
+            requested, every combination is stored in dest/layer<rep_layer>_<pooling>.
+            Per-residue representations are stored in a ResidueStore.
         model (str): choose either esm2 or esm1v
         batch_size (int): batch size. Default 10
-        rep_layer (int): choose representation layer. Default 33.
+        rep_layer (int or list): choose representation layer(s). Default 33.
         pbar: Progress bar for shiny app
         device (str): Choose hardware for computation. Default 'None' for autoselection
                           other options are 'cpu' and 'cuda'.
-
-    Returns: representations (list) of sequence representation.
+        dtype (str or torch.dtype): Precision of the model weights. Default None (float32).
+        max_tokens_per_batch (int): If provided, sequences are sorted by length and packed into
+            batches of at most max_tokens_per_batch padded tokens, instead of batches of
+            batch_size sequences in input order. Default None.
+        storage_dtype (str): dtype of a new embedding store at dest, 'float32', 'float16',
+            'bfloat16' or 'int8'. Existing stores keep their dtype. Default 'float32'.
+        pooling (str or list): 'mean', 'bos', 'attention' or 'per_residue', see get_seq_rep.
+            Default 'mean'.
+        n_workers (int): Number of worker processes for CPU computation. Workers share the
+            model weights, pull batches from a queue and send the representations back
+            to the calling process, which writes them to dest. Workers are spawned, so
+            scripts need an `if __name__ == "__main__":` guard. Default None (no workers).
+        threads_per_worker (int): Intra-op threads per worker. Default None (cpu count
+            divided by n_workers).
+        max_length (int): Skip sequences longer than max_length. Default 1022, the
+            context size of esm2 and esm1v. None disables the check.
+
+    Returns: representations (list) of sequence representation in the order of seqs,
+        if dest is None. A dictionary of lists keyed by (rep_layer, pooling) if several
+        layers or poolings are requested.
 
     Example:
         1.
@@ -203,34 +591,438 @@ def batch_compute(
 
         2.
         batch_compute(fasta_path='file.fasta', dest='path')
+
+        3.
+        reps = batch_compute(seqs=seqs, max_tokens_per_batch=4096)
+
+        4.
+        reps = batch_compute(seqs=seqs, rep_layer=[20, 33], pooling=["mean", "per_residue"])
+        reps[(33, "per_residue")]
     """
+    if fasta_path is None and seqs is None:
+        raise ValueError("Either fasta_path or seqs must not be None")
+
+    if seqs is None:
+        names, seqs = load_fasta(fasta_path)
+
+    if names is None:
+        names = [f"seq{i}" for i in range(len(seqs))]
+
+    layers = [rep_layer] if isinstance(rep_layer, int) else list(rep_layer)
+    pooling_types = [pooling] if isinstance(pooling, str) else list(pooling)
+    for p in pooling_types:
+        if p not in poolings:
+            raise ValueError(
+                f"'{p}' is not a supported pooling. Choose from {poolings}"
+            )
+    outputs = [(layer, p) for layer in layers for p in pooling_types]
+
+    stores = None
+    if dest is not None:
+        stores = {}
+        for layer, p in outputs:
+            path = (
+                dest if len(outputs) == 1 else os.path.join(dest, f"layer{layer}_{p}")
+            )
+            store_class = ResidueStore if p == "per_residue" else EmbeddingStore
+            stores[layer, p] = store_class(path, dtype=storage_dtype)
+            stores[layer, p].update_metadata(
+                model=model if isinstance(model, str) else type(model).__name__,
+                rep_layer=layer,
+                dtype=str(_resolve_dtype(dtype)),
+                pooling=p,
+            )
+
+    if (
+        n_workers is not None
+        and n_workers > 1
+        and _resolve_device(device).type != "cpu"
+    ):
+        raise ValueError("n_workers > 1 is only supported for computations on the cpu")
+
+    # load the model once for all batches
+    model_alphabet = None
+    if isinstance(model, str):
+        model, model_alphabet = model_registry.load(model, device=device, dtype=dtype)
+
+    skipped = validate_sequences(seqs, model_alphabet or alphabet, max_length)
+    skipped = {names[i]: reason for i, reason in skipped.items()}
+
+    keys = [sequence_hash(seq) for seq in seqs]
+
+    # sequences of interrupted jobs that are stored already are not computed again,
+    # names of sequences that are stored under another name are linked to them
+    todo = [i for i in range(len(seqs)) if names[i] not in skipped]
+    n_linked = 0
+    if stores is not None:
+        todo = [
+            i
+            for i in todo
+            if not all(
+                names[i] in st and st.keys.get(names[i], keys[i]) == keys[i]
+                for st in stores.values()
+            )
+        ]
+        linked = [
+            i
+            for i in todo
+            if all(st.name_of(keys[i]) is not None for st in stores.values())
+        ]
+        for st in stores.values():
+            st.link(
+                [names[i] for i in linked],
+                [st.name_of(keys[i]) for i in linked],
+                [keys[i] for i in linked],
+            )
+        n_linked = len(linked)
+        linked = set(linked)
+        todo = [i for i in todo if i not in linked]
+
+    # identical sequences are computed once
+    first, duplicates = {}, []
+    for i in todo:
+        if keys[i] in first:
+            duplicates.append(i)
+        else:
+            first[keys[i]] = i
+    todo = list(first.values())
+
+    if max_tokens_per_batch is None:
+        batches = (todo[i : i + batch_size] for i in range(0, len(todo), batch_size))
+    else:
+        batches = (
+            [todo[i] for i in batch]
+            for batch in length_sorted_batches(
+                [seqs[i] for i in todo], max_tokens_per_batch
+            )
+        )
+
+    representations = None
     if dest is None:
-        raise "No save destination provided."
+        representations = {output: [None] * len(seqs) for output in outputs}
 
-    if fasta_path is None and seqs is None:
-        raise "Either fasta_path or seqs must not be None"
+    compute_kwargs = dict(
+        model=model,
+        alphabet=model_alphabet,
+        outputs=outputs,
+        device=device,
+    )
+    if n_workers is not None and n_workers > 1:
+        completed = _parallel_batches(
+            seqs, names, batches, skipped, n_workers, threads_per_worker, compute_kwargs
+        )
+    else:
+        completed = (
+            result
+            for batch in batches
+            for result in _isolate_failures(seqs, names, batch, skipped, compute_kwargs)
+        )
 
     counter = 0
-    for i in range(0, len(seqs), batch_size):
-        results, batch_lens, _, _ = esm_compute(
-            seqs[i : i + batch_size],
-            names[i : i + batch_size],
-            model=model,
-            rep_layer=rep_layer,
-            device=device,
-        )
-        sequence_representations = get_seq_rep(results, batch_lens)
-        if dest is not None:
-            for j in range(len(sequence_representations)):
-                _dest = os.path.join(dest, names[i : i + batch_size][j])
-                torch.save(sequence_representations[j], _dest + ".pt")
+    for batch, batch_representations in completed:
+        batch_names = [names[j] for j in batch]
+        for output, sequence_representations in batch_representations.items():
+            if stores is not None:
+                stores[output].append(
+                    batch_names,
+                    sequence_representations,
+                    keys=[keys[j] for j in batch],
+                )
+            else:
+                # write results back to the position of the sequence in the input
+                for j, rep in zip(batch, sequence_representations):
+                    representations[output][j] = rep
         if pbar:
-            counter += len(seqs[i : i + batch_size])
+            counter += len(batch)
             pbar.set(
                 counter,
                 message="Computing",
-                detail=f"{counter}/{len(seqs)} computed...",
+                detail=f"{counter}/{len(todo)} computed...",
+            )
+
+    # duplicates share the representation of the first name with the same sequence
+    shared = []
+    for i in duplicates:
+        j = first[keys[i]]
+        if names[j] in skipped:
+            skipped[names[i]] = skipped[names[j]]
+        elif stores is not None:
+            shared.append((i, j))
+        else:
+            for output in outputs:
+                representations[output][i] = representations[output][j]
+    if stores is not None:
+        for st in stores.values():
+            st.link(
+                [names[i] for i, _ in shared],
+                [names[j] for _, j in shared],
+                [keys[i] for i, _ in shared],
+            )
+
+    if duplicates or n_linked:
+        print(f"{len(duplicates) + n_linked} duplicate sequences share representations")
+
+    if dest is not None:
+        _write_skipped(dest, skipped)
+    if skipped:
+        print(f"Skipped {len(skipped)} sequences:")
+        for name, reason in list(skipped.items())[:10]:
+            print(f"\t{name}: {reason}")
+        if len(skipped) > 10 and dest is not None:
+            print(f"\t... see {os.path.join(dest, 'skipped.tsv')}")
+
+    if representations is not None and len(outputs) == 1:
+        return representations[outputs[0]]
+    return representations
+
+
+def validate_sequences(
+    seqs: list, alphabet: esm.data.Alphabet = alphabet, max_length=1022
+) -> dict:
+    """
+    Finds sequences that can not be embedded by a model.
+
+    Args:
+        seqs (list): protein sequences.
+        alphabet (esm.data.Alphabet): alphabet of the model.
+        max_length (int): maximum sequence length. None disables the check.
+
+    Returns:
+        dict: reason for every invalid sequence, keyed by the index of the sequence.
+    """
+    valid = set(alphabet.standard_toks)
+    invalid = {}
+    for i, seq in enumerate(seqs):
+        seq = str(seq)
+        characters = set(seq) - valid
+        if characters:
+            invalid[i] = f"invalid characters {''.join(sorted(characters))}"
+        elif len(seq) == 0:
+            invalid[i] = "empty sequence"
+        elif max_length is not None and len(seq) > max_length:
+            invalid[i] = f"length {len(seq)} exceeds max_length {max_length}"
+    return invalid
+
+
+def _write_skipped(dest: str, skipped: dict):
+    """
+    Atomically replaces the list of sequences skipped by batch_compute in dest.
+    """
+    path = os.path.join(dest, "skipped.tsv")
+    if not skipped:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    os.makedirs(dest, exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        for name, reason in skipped.items():
+            f.write(f"{name}\t{reason}\n")
+    os.replace(path + ".tmp", path)
+
+
+def _failure(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def _is_sequence_failure(error: Exception) -> bool:
+    """
+    Whether an error can be caused by individual sequences of a batch, i.e. running
+    out of memory or exceeding the context size of the model, rather than by the
+    model or the setup, which would fail for every sequence.
+    """
+    if isinstance(error, MemoryError):
+        return True
+    if isinstance(error, getattr(torch.cuda, "OutOfMemoryError", ())):
+        return True
+    message = str(error)
+    return isinstance(error, (RuntimeError, IndexError)) and (
+        "out of memory" in message or "index out of range" in message
+    )
+
+
+def _isolate_failures(
+    seqs: list, names: list, batch: list, skipped: dict, compute_kwargs: dict
+):
+    """
+    Computes a batch, batches that fail for sequence specific reasons are split
+    in halves until the failing sequences are found and added to skipped. Other
+    errors, or a batch in which every sequence fails, are raised. Yields
+    (batch, representations).
+    """
+    try:
+        reps = _compute_batch(seqs, names, batch, **compute_kwargs)
+    except Exception as e:
+        if not _is_sequence_failure(e):
+            raise
+        failed = {}
+        computed = yield from _bisect_failures(
+            seqs, names, batch, failed, compute_kwargs, e
+        )
+        if computed == 0 and len(batch) > 1:
+            raise e
+        skipped.update(failed)
+        return
+    yield batch, reps
+
+
+def _bisect_failures(
+    seqs: list,
+    names: list,
+    batch: list,
+    skipped: dict,
+    compute_kwargs: dict,
+    error: Exception,
+):
+    """
+    Splits a batch that failed with error in halves and computes them, see
+    _isolate_failures. Returns the number of computed sequences.
+    """
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    if len(batch) == 1:
+        skipped[names[batch[0]]] = _failure(error)
+        return 0
+
+    computed = 0
+    half = len(batch) // 2
+    for part in [batch[:half], batch[half:]]:
+        try:
+            reps = _compute_batch(seqs, names, part, **compute_kwargs)
+        except Exception as e:
+            if not _is_sequence_failure(e):
+                raise
+            computed += yield from _bisect_failures(
+                seqs, names, part, skipped, compute_kwargs, e
             )
+            continue
+        yield part, reps
+        computed += len(part)
+    return computed
+
+
+def _compute_batch(
+    seqs: list, names: list, batch: list, model, alphabet, outputs: list, device=None
+) -> dict:
+    """
+    Computes the representations of one batch of batch_compute. Returns a
+    dictionary of lists of representations keyed by (rep_layer, pooling).
+    """
+    results, batch_lens, _, _ = esm_compute(
+        [seqs[j] for j in batch],
+        [names[j] for j in batch],
+        model=model,
+        rep_layer=sorted({layer for layer, _ in outputs}),
+        device=device,
+        alphabet=alphabet,
+        need_head_weights=any(p == "attention" for _, p in outputs),
+    )
+    return {
+        (layer, p): get_seq_rep(results, batch_lens, rep_layer=layer, pooling=p)
+        for layer, p in outputs
+    }
+
+
+def _parallel_batches(
+    seqs: list,
+    names: list,
+    batches,
+    skipped: dict,
+    n_workers: int,
+    threads_per_worker: Union[int, None],
+    compute_kwargs: dict,
+):
+    """
+    Computes batches in n_workers processes that share the model weights.
+    Batches that fail for sequence specific reasons are split and queued again
+    until the failing sequences are found and added to skipped. Other errors,
+    or a batch in which every sequence fails, are raised. Yields
+    (batch, representations) in the order batches complete.
+    """
+    # the worker lives in its own module, which spawned processes can import by name
+    from proteusAI.ml_tools.esm_tools.worker import embedding_worker
+
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+
+    # workers are spawned, forking after torch/OpenMP initialised its thread pools
+    # can deadlock, and receive the weights through shared memory
+    compute_kwargs["model"].share_memory()
+    ctx = torch.multiprocessing.get_context("spawn")
+
+    # batches are tracked by the input batch they were split from: the number of
+    # its parts in the queue, its computed sequences and its failed sequences
+    tasks, results = ctx.Queue(), ctx.Queue()
+    pending = 0
+    roots = {}
+    for root, batch in enumerate(batches):
+        tasks.put((root, batch))
+        roots[root] = [1, 0, {}, len(batch)]
+        pending += 1
+
+    workers = [
+        ctx.Process(
+            target=embedding_worker,
+            args=(tasks, results, seqs, names, threads_per_worker, compute_kwargs),
+            daemon=True,
+        )
+        for _ in range(n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        while pending > 0:
+            try:
+                status, root, batch, payload = results.get(timeout=1)
+            except queue.Empty:
+                # a worker that died holding a batch would leave it pending forever
+                for worker in workers:
+                    if worker.exitcode not in (None, 0):
+                        raise RuntimeError(
+                            f"Embedding worker exited unexpectedly with code {worker.exitcode}"
+                        )
+                if not any(worker.is_alive() for worker in workers):
+                    raise RuntimeError("Embedding workers exited unexpectedly")
+                continue
+
+            pending -= 1
+            lineage = roots[root]
+            lineage[0] -= 1
+            if status == "error":
+                raise RuntimeError(f"Embedding worker failed: {payload}")
+            elif status == "failed":
+                if len(batch) == 1:
+                    lineage[2][names[batch[0]]] = payload
+                else:
+                    half = len(batch) // 2
+                    tasks.put((root, batch[:half]))
+                    tasks.put((root, batch[half:]))
+                    lineage[0] += 2
+                    pending += 2
+            else:
+                lineage[1] += len(batch)
+                yield batch, {
+                    output: [torch.from_numpy(r) for r in values]
+                    for output, values in payload.items()
+                }
+
+            n_queued, n_computed, failed, size = lineage
+            if n_queued == 0:
+                if n_computed == 0 and size > 1:
+                    raise RuntimeError(
+                        f"All {size} sequences of a batch failed: {payload}"
+                    )
+                skipped.update(failed)
+                del roots[root]
+    finally:
+        for _ in workers:
+            tasks.put(None)
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
 
 
 def mask_positions(sequence: str, mask_char: str = "<mask>"):
@@ -257,6 +1049,42 @@ def mask_positions(sequence: str, mask_char: str = "<mask>"):
     return masked_sequences
 
 
+# Zero-shot scoring modes of get_mutant_logits
+zs_modes = ["masked_marginal", "wt_marginal", "multi_mask"]
+
+
+def mask_groups(sequence_length: int, mode: str = "masked_marginal", mask_k: int = 4):
+    """
+    Groups of positions that are masked together in one forward pass.
+
+    Args:
+        sequence_length (int): length of the sequence.
+        mode (str): 'masked_marginal' masks every position separately, 'wt_marginal'
+            returns a single empty group (one unmasked pass) and 'multi_mask' masks up to
+            mask_k positions per pass, spaced so that masked positions are never adjacent.
+        mask_k (int): maximum number of masked positions per pass in 'multi_mask' mode.
+
+    Returns:
+        list: list of lists of positions.
+
+    Examples:
+        mask_groups(5, mode='multi_mask', mask_k=2)
+        [[0, 3], [1, 4], [2]]
+    """
+    if mode == "masked_marginal":
+        return [[i] for i in range(sequence_length)]
+    elif mode == "wt_marginal":
+        return [[]]
+    elif mode == "multi_mask":
+        stride = max(2, math.ceil(sequence_length / mask_k))
+        return [
+            list(range(g, sequence_length, stride))
+            for g in range(min(stride, sequence_length))
+        ]
+    else:
+        raise ValueError(f"'{mode}' is not a supported mode. Choose from {zs_modes}")
+
+
 def get_mutant_logits(
     seq: str,
     model: str = "esm1v",
@@ -265,13 +1093,18 @@ def get_mutant_logits(
     alphabet_size: int = 33,
     pbar=None,
     device=None,
+    dtype=None,
+    mode: str = "masked_marginal",
+    mask_k: int = 4,
 ):
     """
-    Exhaustively compute the logits for every position in a sequence using esm1v or esm2.
-    Every position of a sequence will be masked and the logits for the masked position
-    will be calculated. The probabilities for every position will be concatenated in a
-    combined logits tensor, which will be returned together with the alphabet.
-    Keep in mind: the returned logits have start of sequence and end of sequence tokens attached
+    Compute the logits for every position in a sequence using esm1v or esm2.
+    By default every position of a sequence will be masked and the logits for the
+    masked position will be calculated (exact masked marginals, one forward pass per
+    position). The 'wt_marginal' mode reads all positions from one unmasked pass and
+    the 'multi_mask' mode masks mask_k non-adjacent positions per pass. The logits for
+    every position will be concatenated in a combined logits tensor, which will be
+    returned together with the alphabet.
 
     Args:
         seq (str): native protein sequence
@@ -281,6 +1114,9 @@ def get_mutant_logits(
         pbar: ProteusAI progress bar.
         device (str): Choose hardware for computation. Default 'None' for autoselection
                           other options are 'cpu' and 'cuda'.
+        dtype (str or torch.dtype): Precision of the model weights. Default None (float32).
+        mode (str): 'masked_marginal', 'wt_marginal' or 'multi_mask'. Default 'masked_marginal'.
+        mask_k (int): Masked positions per pass in 'multi_mask' mode. Default 4.
 
     Returns:
         tuple: torch.Tensor (1, sequence_length, alphabet_size) and alphabet esm_tools.data_tools.Alphabet
@@ -289,48 +1125,132 @@ def get_mutant_logits(
         1.
         seq = "AGHRFLIKLKI"
         logits = get_mutant_logits(seq=seq)
+
+        2.
+        logits = get_mutant_logits(seq=seq, mode="wt_marginal")
     """
     assert isinstance(seq, str)
 
-    masked_seqs = mask_positions(
-        seq
-    )  # list of sequences where every position has been masked once
-    names = [f"seq{i}" for i in range(len(masked_seqs))]
     sequence_length = len(seq)
+    groups = mask_groups(sequence_length, mode=mode, mask_k=mask_k)
 
     # Initialize an empty tensor of the desired shape
     logits_tensor = torch.zeros(1, sequence_length, alphabet_size)
 
+    # load the model once for all batches
+    device = _resolve_device(device)
+    if isinstance(model, str):
+        model, alphabet = model_registry.load(model, device=device, dtype=dtype)
+    elif isinstance(model, torch.nn.Module):
+        alphabet = esm.data.Alphabet.from_architecture("ESM-1b")
+        model.eval()
+        model.to(device)
+    else:
+        raise TypeError("Model should be either a string or a torch.nn.Module object")
+
+    # tokenize the wildtype once, masked batches are built on the token level
+    _, _, wt_tokens = alphabet.get_batch_converter()([("wt", seq)])
+    offset = int(alphabet.prepend_bos)
+
     counter = 0
-    for i in range(0, len(masked_seqs), batch_size):
-        results, batch_lens, batch_labels, alphabet = esm_compute(
-            masked_seqs[i : i + batch_size],
-            names[i : i + batch_size],
-            model=model,
-            rep_layer=rep_layer,
-            device=device,
+    for i in range(0, len(groups), batch_size):
+        batch_groups = groups[i : i + batch_size]
+        rows, positions = _group_index(batch_groups)
+        batch_tokens = _mask_tokens(
+            wt_tokens, len(batch_groups), rows, positions + offset, alphabet
         )
-        logits = results["logits"]
 
-        counter += len(masked_seqs[i : i + batch_size])
+        with torch.no_grad():
+            logits = model(batch_tokens.to(device))["logits"].cpu().float()
+
+        counter += len(batch_groups)
 
         if pbar:
             pbar.set(
                 counter,
                 message="Computing",
-                detail=f"{counter}/{len(masked_seqs)} positions computed...",
+                detail=f"{counter}/{len(groups)} forward passes computed...",
             )
         else:
-            print(f"{counter}/{len(masked_seqs)} positions computed...")
+            print(f"{counter}/{len(groups)} forward passes computed...")
 
-        # Extract the logits corresponding to the masked position for each sequence in the batch
-        for j, masked_seq_name in enumerate(names[i : i + batch_size]):
-            masked_position = int(masked_seq_name[3:])
-            logits_tensor[0, masked_position] = logits[j, masked_position + 1]
+        # Extract the logits of the masked positions (or all positions if nothing was masked)
+        if len(positions):
+            logits_tensor[0, positions] = logits[rows, positions + offset]
+        else:
+            logits_tensor[0] = logits[0, offset : sequence_length + offset]
 
     return logits_tensor, alphabet
 
 
+def _group_index(groups: list):
+    """
+    Flatten groups of masked positions into row and position index tensors.
+    """
+    rows = torch.tensor([j for j, group in enumerate(groups) for _ in group])
+    positions = torch.tensor([pos for group in groups for pos in group])
+    return rows.long(), positions.long()
+
+
+def _mask_tokens(
+    tokens: torch.Tensor,
+    n_rows: int,
+    rows: torch.Tensor,
+    columns: torch.Tensor,
+    alphabet: esm.data.Alphabet,
+):
+    """
+    Repeat a tokenized sequence n_rows times and place the mask token at (rows, columns).
+    """
+    batch_tokens = tokens.repeat(n_rows, 1)
+    batch_tokens[rows, columns] = alphabet.mask_idx
+    return batch_tokens
+
+
+def zs_agreement(
+    mmp_ref: torch.Tensor,
+    mmp: torch.Tensor,
+    wt_seq: str,
+    alphabet: esm.data.Alphabet = alphabet,
+    top_k: int = 50,
+):
+    """
+    Compare zero-shot scores of an approximate mode against reference scores,
+    usually exact masked marginals, over all single mutants of wt_seq.
+
+    Args:
+        mmp_ref (torch.Tensor): reference masked marginal probabilities.
+        mmp (torch.Tensor): masked marginal probabilities to compare.
+        wt_seq (str): wildtype sequence.
+        alphabet (esm.data.Alphabet): alphabet used for the model.
+        top_k (int): number of top ranked mutants used for the overlap. Default 50.
+
+    Returns:
+        dict: spearman and pearson correlation and the fraction of shared top_k mutants.
+    """
+    if not isinstance(alphabet, dict):
+        alphabet = alphabet.to_dict()
+
+    canonical = torch.tensor([alphabet[aa] for aa in canonical_aas])
+    mutant_mask = torch.ones(len(wt_seq), len(canonical_aas), dtype=torch.bool)
+    for i, aa in enumerate(wt_seq):
+        if aa in canonical_aas:
+            mutant_mask[i, canonical_aas.index(aa)] = False
+
+    ref = mmp_ref[0, :, canonical][mutant_mask].numpy()
+    other = mmp[0, :, canonical][mutant_mask].numpy()
+
+    top_k = min(top_k, len(ref))
+    top_ref = set(np.argsort(ref)[::-1][:top_k])
+    top_other = set(np.argsort(other)[::-1][:top_k])
+
+    return {
+        "spearman": float(spearmanr(ref, other)[0]),
+        "pearson": float(pearsonr(ref, other)[0]),
+        f"top_{top_k}_overlap": len(top_ref & top_other) / top_k,
+    }
+
+
 def masked_marginal_probability(
     p: torch.Tensor, wt_seq: str, alphabet: esm.data.Alphabet
 ):
@@ -466,6 +1386,110 @@ def find_mutations(native_seq, predicted_seq):
     return mutations
 
 
+class MutantSequences(Sequence):
+    """
+    Lazy list of single mutant sequences of a wildtype. A sequence is only
+    built when it is accessed.
+
+    Args:
+        wt_seq (str): wildtype sequence.
+        positions (np.ndarray): 0-based mutated position of every mutant.
+        aas (np.ndarray): mutant residue of every mutant.
+    """
+
+    def __init__(self, wt_seq: str, positions, aas):
+        self.wt_seq = wt_seq
+        self.positions = np.asarray(positions)
+        self.aas = np.asarray(aas)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        pos = int(self.positions[index])
+        return self.wt_seq[:pos] + str(self.aas[index]) + self.wt_seq[pos + 1 :]
+
+
+def mutant_positions(wt_seq: str):
+    """
+    Positions and residues of all canonical single mutants of a sequence, ordered
+    by position and then by residue in canonical_aas order.
+
+    Args:
+        wt_seq (str): wildtype sequence.
+
+    Returns:
+        tuple: positions (np.ndarray) and mutant residues (np.ndarray).
+    """
+    positions, aa_ids = _mutant_index(wt_seq)
+    return positions, np.array(canonical_aas)[aa_ids]
+
+
+def _mutant_index(wt_seq: str):
+    """
+    Positions and canonical_aas indices of all canonical single mutants.
+    """
+    aas = np.array(canonical_aas)
+    positions = np.repeat(np.arange(len(wt_seq)), len(aas))
+    aa_ids = np.tile(np.arange(len(aas)), len(wt_seq))
+    keep = np.array(list(wt_seq))[positions] != aas[aa_ids]
+    return positions[keep], aa_ids[keep]
+
+
+def mutant_table(
+    wt_seq: str,
+    alphabet: Union[esm.data.Alphabet, dict, None] = None,
+    p: Union[torch.Tensor, None] = None,
+    mmp: Union[torch.Tensor, None] = None,
+    entropy: Union[torch.Tensor, None] = None,
+    sequences: bool = True,
+):
+    """
+    Saturation mutagenesis table of all canonical single mutants. Scores are
+    gathered from the tensors in one indexing operation per column.
+
+    Args:
+        wt_seq (str): Wildtype sequence.
+        alphabet (esm.data.Alphabet): Alphabet used for the model. Required if scores are provided.
+        p (torch.Tensor): Probability distribution tensor. Default None (empty column).
+        mmp (torch.Tensor): Masked marginal probability tensor. Default None (empty column).
+        entropy (torch.Tensor): Per-position entropy tensor. Default None (empty column).
+        sequences (bool): Add the mutant sequences as 'sequence' column. Default True.
+
+    Returns:
+        pd.DataFrame: columns mutant, (sequence), p, mmp, entropy.
+    """
+    positions, aa_ids = _mutant_index(wt_seq)
+    aas = np.array(canonical_aas)[aa_ids]
+    wt_aas = np.array(list(wt_seq))[positions]
+    mutants = np.char.add(np.char.add(wt_aas, (positions + 1).astype(str)), aas)
+
+    table = {"mutant": mutants.tolist()}
+    if sequences:
+        table["sequence"] = list(MutantSequences(wt_seq, positions, aas))
+
+    if alphabet is not None and not isinstance(alphabet, dict):
+        alphabet = alphabet.to_dict()
+
+    pos_index = torch.from_numpy(positions)
+    for name, values in [("p", p), ("mmp", mmp)]:
+        if values is None:
+            table[name] = [None] * len(mutants)
+        else:
+            aa_index = torch.tensor([alphabet[aa] for aa in canonical_aas])
+            aa_index = aa_index[torch.from_numpy(aa_ids)]
+            table[name] = values[0, pos_index, aa_index].float().numpy()
+
+    if entropy is None:
+        table["entropy"] = [None] * len(mutants)
+    else:
+        table["entropy"] = entropy[0, pos_index].float().numpy()
+
+    return pd.DataFrame(table)
+
+
 def zs_to_csv(
     wt_seq: str,
     alphabet: esm.data.Alphabet,
@@ -475,7 +1499,8 @@ def zs_to_csv(
     dest: str,
 ):
     """
-    Save the results as a CSV file.
+    Save the results as a CSV file. The scores are also saved in columnar form
+    next to the CSV ('.npz'), which can be read with load_zs_scores.
 
     Args:
         wt_seq (str): Wildtype sequence.
@@ -485,55 +1510,49 @@ def zs_to_csv(
         entropy (torch.Tensor): Per-position entropy tensor.
         dest (str): Destination path for the CSV file.
     """
-    # Convert alphabet to list for indexing
-    alphabet_list = list(alphabet.to_dict().keys())  # noqa: F841
-    alphabet = alphabet.to_dict()
-    canonical_aas = [
-        "A",
-        "R",
-        "N",
-        "D",
-        "C",
-        "Q",
-        "E",
-        "G",
-        "H",
-        "I",
-        "L",
-        "K",
-        "M",
-        "F",
-        "P",
-        "S",
-        "T",
-        "W",
-        "Y",
-        "V",
-    ]
-
-    mutants, sequences, p_values, mmp_values, entropy_values = [], [], [], [], []
-    for pos in range(len(wt_seq)):
-        for aa in canonical_aas:
-            if wt_seq[pos] != aa:
-                mutants.append(wt_seq[pos] + str(pos + 1) + aa)
-                sequences.append(wt_seq[:pos] + aa + wt_seq[pos + 1 :])
-                p_values.append(p[0, pos, alphabet[aa]].item())
-                mmp_values.append(mmp[0, pos, alphabet[aa]].item())
-                entropy_values.append(entropy[0, pos].item())
+    df = mutant_table(wt_seq, alphabet, p, mmp, entropy, sequences=True)
+    df.to_csv(dest, index=False)
 
-    df = pd.DataFrame(
-        {
-            "mutant": mutants,
-            "sequence": sequences,
-            "p": p_values,
-            "mmp": mmp_values,
-            "entropy": entropy_values,
-        }
+    positions, aas = mutant_positions(wt_seq)
+    np.savez(
+        os.path.splitext(dest)[0] + ".npz",
+        wt_seq=np.array(wt_seq),
+        positions=positions.astype(np.int32),
+        aas=aas,
+        mutant=df["mutant"].to_numpy(dtype=str),
+        p=df["p"].to_numpy(dtype=np.float32),
+        mmp=df["mmp"].to_numpy(dtype=np.float32),
+        entropy=df["entropy"].to_numpy(dtype=np.float32),
     )
-    df.to_csv(dest, index=False)
+
     return df
 
 
+def load_zs_scores(path: str):
+    """
+    Load zero-shot scores saved by zs_to_csv in columnar form.
+
+    Args:
+        path (str): path to the '.npz' file or the corresponding '.csv' file.
+
+    Returns:
+        tuple: pd.DataFrame (mutant, p, mmp, entropy) and the mutant sequences as
+            MutantSequences, which are built lazily.
+    """
+    with np.load(os.path.splitext(path)[0] + ".npz") as data:
+        df = pd.DataFrame(
+            {
+                "mutant": data["mutant"].tolist(),
+                "p": data["p"],
+                "mmp": data["mmp"],
+                "entropy": data["entropy"],
+            }
+        )
+        seqs = MutantSequences(str(data["wt_seq"]), data["positions"], data["aas"])
+
+    return df, seqs
+
+
 ### Protein structure
 def string_to_tempfile(data):
     """
@@ -0,0 +1,36 @@
+# This source code is part of the proteusAI package and is distributed
+# under the MIT License.
+
+# __name__ is not overwritten in this module: spawned processes import the
+# worker function by the module path it was pickled with.
+__author__ = "Jonathan Funk"
+
+import torch
+
+from proteusAI.ml_tools.esm_tools.esm_tools import (
+    _compute_batch,
+    _failure,
+    _is_sequence_failure,
+)
+
+
+def embedding_worker(tasks, results, seqs, names, threads, compute_kwargs):
+    """
+    Worker process of batch_compute, computes batches until it receives None.
+    """
+    torch.set_num_threads(threads)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        root, batch = task
+        try:
+            reps = _compute_batch(seqs, names, batch, **compute_kwargs)
+            reps = {
+                output: [r.cpu().numpy() for r in values]
+                for output, values in reps.items()
+            }
+            results.put(("ok", root, batch, reps))
+        except Exception as e:
+            status = "failed" if _is_sequence_failure(e) else "error"
+            results.put((status, root, batch, _failure(e)))
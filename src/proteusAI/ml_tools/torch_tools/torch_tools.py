@@ -4,7 +4,63 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from typing import Union
+from functools import lru_cache
 import gpytorch
+import scipy.sparse as sp
+
+MATRICES_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "matrices")
+
+
+@lru_cache(maxsize=None)
+def _load_alphabet() -> tuple:
+    """
+    Loads the amino acid alphabet once per process.
+    """
+    return tuple(np.loadtxt(os.path.join(MATRICES_PATH, "alphabet"), dtype=str))
+
+
+@lru_cache(maxsize=None)
+def _load_blosum(matrix: str) -> torch.Tensor:
+    """
+    Loads a BLOSUM matrix once per process. Rows follow the alphabet.
+    """
+    if matrix not in ("BLOSUM50", "BLOSUM62"):
+        raise ValueError(
+            "Invalid BLOSUM matrix choice. Choose 'BLOSUM50' or 'BLOSUM62'."
+        )
+    values = np.loadtxt(os.path.join(MATRICES_PATH, matrix), dtype=float)
+    return torch.tensor(values.reshape((24, -1)).T, dtype=torch.float32)
+
+
+@lru_cache(maxsize=32)
+def _code_table(alphabet: tuple) -> np.ndarray:
+    """
+    Lookup table from ASCII byte to alphabet index. Characters outside the
+    alphabet map to len(alphabet).
+    """
+    table = np.full(256, len(alphabet), dtype=np.int64)
+    for i, char in enumerate(alphabet):
+        table[ord(char)] = i
+    return table
+
+
+def _sequence_codes(sequences: list, alphabet: tuple, padded_length: int):
+    """
+    Converts sequences into a (number of sequences, padded_length) array of
+    alphabet indices. Unknown characters are encoded as len(alphabet) and
+    padding as len(alphabet) + 1. Sequences longer than padded_length are truncated.
+    """
+    sequences = [str(sequence)[:padded_length] for sequence in sequences]
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64)
+    joined = "".join(sequences).encode("ascii", errors="replace")
+
+    codes = np.full((len(sequences), padded_length), len(alphabet) + 1, np.int64)
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    cols = np.arange(len(rows)) - offsets
+    codes[rows, cols] = _code_table(alphabet)[np.frombuffer(joined, dtype=np.uint8)]
+
+    return torch.from_numpy(codes)
 
 
 def one_hot_encoder(sequences, alphabet=None, canonical=True, pbar=None, padding=None):
@@ -31,46 +87,30 @@ def one_hot_encoder(sequences, alphabet=None, canonical=True, pbar=None, padding
 
     # Load the alphabet from a file if it's not provided
     if alphabet is None:
-        # Get the directory of the current script
-        script_dir = os.path.dirname(os.path.realpath(__file__))
-
-        ### Amino Acid codes
-        alphabet_file = os.path.join(script_dir, "matrices/alphabet")
-        alphabet = np.loadtxt(alphabet_file, dtype=str)
+        alphabet = _load_alphabet()
 
     # If canonical is True, only use the first 20 characters of the alphabet
     if canonical:
         alphabet = alphabet[:20]
-
-    # Create a dictionary to map each character in the alphabet to its index
-    alphabet_dict = {char: i for i, char in enumerate(alphabet)}
+    alphabet = tuple(alphabet)
 
     # Determine the length to which sequences should be padded
     max_sequence_length = max(len(sequence) for sequence in sequences)
     padded_length = padding if padding is not None else max_sequence_length
 
-    n_sequences = len(sequences)
-    alphabet_size = len(alphabet)
-
-    # Create an empty tensor of the right size, with padding length
-    tensor = torch.zeros((n_sequences, padded_length, alphabet_size))
-
-    # Fill the tensor
-    for i, sequence in enumerate(sequences):
-        if pbar:
-            pbar.set(
-                i, message="Computing", detail=f"{i}/{len(sequences)} remaining..."
-            )
-        for j, character in enumerate(sequence):
-            if j >= padded_length:
-                break  # Stop if the sequence length exceeds the padded length
-            # Get the index of the character in the alphabet
-            char_index = alphabet_dict.get(
-                character, -1
-            )  # Return -1 if character is not in the alphabet
-            if char_index != -1:
-                # Set the corresponding element of the tensor to 1
-                tensor[i, j, char_index] = 1.0
+    codes = _sequence_codes(sequences, alphabet, padded_length)
+
+    # unknown characters and padding are encoded as zero rows
+    table = torch.zeros((len(alphabet) + 2, len(alphabet)))
+    table[: len(alphabet)] = torch.eye(len(alphabet))
+    tensor = table[codes]
+
+    if pbar:
+        pbar.set(
+            len(sequences),
+            message="Computing",
+            detail=f"{len(sequences)}/{len(sequences)} encoded...",
+        )
 
     # If the input was a string, return a tensor of shape (padded_length, alphabet_size)
     if singular:
@@ -107,67 +147,29 @@ def blosum_encoding(
     else:
         singular = False
 
-    # Get the directory of the current script
-    script_dir = os.path.dirname(os.path.realpath(__file__))
-
-    # Load the alphabet
-    alphabet_file = os.path.join(script_dir, "matrices/alphabet")
-    alphabet = np.loadtxt(alphabet_file, dtype=str)
-
-    # Define BLOSUM matrices
-    _blosum50 = (
-        np.loadtxt(os.path.join(script_dir, "matrices/BLOSUM50"), dtype=float)
-        .reshape((24, -1))
-        .T
-    )
-    _blosum62 = (
-        np.loadtxt(os.path.join(script_dir, "matrices/BLOSUM62"), dtype=float)
-        .reshape((24, -1))
-        .T
-    )
-
-    # Choose BLOSUM matrix
-    if matrix == "BLOSUM50":
-        matrix = _blosum50
-    elif matrix == "BLOSUM62":
-        matrix = _blosum62
-    else:
-        raise ValueError(
-            "Invalid BLOSUM matrix choice. Choose 'BLOSUM50' or 'BLOSUM62'."
-        )
-
-    # Create the BLOSUM encoding dictionary
-    blosum_matrix = {}
-    for i, letter_1 in enumerate(alphabet):
-        if canonical:
-            blosum_matrix[letter_1] = matrix[i][:20]
-        else:
-            blosum_matrix[letter_1] = matrix[i]
+    alphabet = _load_alphabet()
+    blosum = _load_blosum(matrix)
+    if canonical:
+        blosum = blosum[:, :20]
 
     # Determine the length to which sequences should be padded
     max_sequence_length = max(len(sequence) for sequence in sequences)
     padded_length = padding if padding is not None else max_sequence_length
 
-    n_sequences = len(sequences)
-    alphabet_size = len(blosum_matrix["A"])
-
-    # Create an empty tensor of the right size, with padding length
-    tensor = torch.zeros((n_sequences, padded_length, alphabet_size))
-
-    # Convert each amino acid in sequence to BLOSUM encoding
-    for i, sequence in enumerate(sequences):
-        if pbar:
-            pbar.set(
-                i, message="Computing", detail=f"{i}/{len(sequences)} remaining..."
-            )
-        for j, aa in enumerate(sequence):
-            if j >= padded_length:
-                break  # Stop if the sequence length exceeds the padded length
-            if aa in alphabet:
-                tensor[i, j, :] = torch.tensor(blosum_matrix[aa])
-            else:
-                # Handle unknown amino acids with a default value of 0.5
-                tensor[i, j, :] = 0.5
+    codes = _sequence_codes(sequences, alphabet, padded_length)
+
+    # unknown amino acids are encoded with 0.5, padding with 0
+    table = torch.zeros((len(alphabet) + 2, blosum.shape[1]))
+    table[: len(alphabet)] = blosum
+    table[len(alphabet)] = 0.5
+    tensor = table[codes]
+
+    if pbar:
+        pbar.set(
+            len(sequences),
+            message="Computing",
+            detail=f"{len(sequences)}/{len(sequences)} encoded...",
+        )
 
     # If the input was a string, return a tensor of shape (padded_length, alphabet_size)
     if singular:
@@ -176,6 +178,73 @@ def blosum_encoding(
     return tensor
 
 
+def sparse_one_hot_encoder(sequences, canonical=True, pbar=None, padding=None):
+    """
+    One-hot encodes sequences as a sparse CSR matrix with one flattened row per
+    sequence. Only residues found in the alphabet are stored, unknown residues
+    and padding are zero.
+
+    Parameters:
+        sequences (list or str): list of amino acid sequences or a single sequence.
+        canonical (bool): only use canonical amino acids.
+        padding (int or None): the length to which all sequences should be padded.
+                               If None, no padding beyond the length of the longest sequence.
+        pbar: Progress bar for shiny app.
+
+    Returns:
+        scipy.sparse.csr_matrix: (number of sequences, padded length * size of the alphabet)
+    """
+    if isinstance(sequences, str):
+        sequences = [sequences]
+
+    alphabet = _load_alphabet()
+    if canonical:
+        alphabet = alphabet[:20]
+
+    max_sequence_length = max(len(sequence) for sequence in sequences)
+    padded_length = padding if padding is not None else max_sequence_length
+
+    codes = _sequence_codes(sequences, alphabet, padded_length).numpy()
+    rows, positions = np.nonzero(codes < len(alphabet))
+    cols = positions * len(alphabet) + codes[rows, positions]
+
+    matrix = sp.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(sequences), padded_length * len(alphabet)),
+    )
+
+    if pbar:
+        pbar.set(
+            len(sequences),
+            message="Computing",
+            detail=f"{len(sequences)}/{len(sequences)} encoded...",
+        )
+
+    return matrix
+
+
+def sparse_to_codes(matrix, alphabet_size: int = 20) -> torch.Tensor:
+    """
+    Converts a sparse one-hot matrix into a compact (number of sequences, length)
+    tensor of alphabet indices. Positions without a residue are encoded as -1.
+
+    Parameters:
+        matrix (scipy.sparse matrix): one-hot matrix from sparse_one_hot_encoder.
+        alphabet_size (int): size of the alphabet used for encoding. Default 20.
+
+    Returns:
+        torch.Tensor: float tensor of alphabet indices.
+    """
+    matrix = sp.csr_matrix(matrix)
+    codes = np.full(
+        (matrix.shape[0], matrix.shape[1] // alphabet_size), -1, dtype=np.float32
+    )
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    codes[rows, matrix.indices // alphabet_size] = matrix.indices % alphabet_size
+
+    return torch.from_numpy(codes)
+
+
 def plot_attention(attention: list, layer: int, head: int, seq: Union[str, list]):
     """
     Plot the attention weights for a specific layer and head.
@@ -206,13 +275,53 @@ def plot_attention(attention: list, layer: int, head: int, seq: Union[str, list]
     plt.show()
 
 
+class HammingKernel(gpytorch.kernels.Kernel):
+    """
+    Exponential kernel on the normalized Hamming distance of integer encoded
+    sequences, k(x1, x2) = exp(-d(x1, x2) / lengthscale). Inputs are float
+    tensors of alphabet indices as returned by sparse_to_codes.
+    """
+
+    has_lengthscale = True
+
+    def __init__(self, alphabet_size: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.alphabet_size = alphabet_size
+
+    def forward(self, x1, x2, diag=False, **params):
+        length = x1.shape[-1]
+        if diag:
+            matches = (x1 == x2).sum(-1).to(x1.dtype)
+            distance = (length - matches) / length
+            return torch.exp(-distance / self.lengthscale.squeeze(-1))
+        else:
+            # count matches letter by letter to avoid a (n, m, length) tensor
+            matches = 0
+            for letter in range(-1, self.alphabet_size):
+                matches = matches + (x1 == letter).to(x1.dtype) @ (x2 == letter).to(
+                    x1.dtype
+                ).transpose(-2, -1)
+        distance = (length - matches) / length
+        return torch.exp(-distance / self.lengthscale)
+
+
+def _gp_kernel(kernel: str):
+    if kernel == "rbf":
+        base_kernel = gpytorch.kernels.RBFKernel()
+    elif kernel == "hamming":
+        base_kernel = HammingKernel()
+    else:
+        raise ValueError(f"'{kernel}' is not a supported kernel")
+    return gpytorch.kernels.ScaleKernel(base_kernel)
+
+
 class GP(gpytorch.models.ExactGP):
     def __init__(
-        self, train_x, train_y, likelihood, fix_mean=False
+        self, train_x, train_y, likelihood, fix_mean=False, kernel="rbf"
     ):  # special method: instantiate object
         super(GP, self).__init__(train_x, train_y, likelihood)
         self.mean_module = gpytorch.means.ConstantMean()  # attribute
-        self.covar_module = gpytorch.kernels.ScaleKernel(gpytorch.kernels.RBFKernel())
+        self.covar_module = _gp_kernel(kernel)
         self.mean_module.constant.data.fill_(1)  # Set the mean value to 1
         if fix_mean:
             self.mean_module.constant.requires_grad_(False)
@@ -223,17 +332,123 @@ class GP(gpytorch.models.ExactGP):
         return gpytorch.distributions.MultivariateNormal(mean_x, covar_x)
 
 
-def predict_gp(model, likelihood, X):
-    model.eval()
-    likelihood.eval()
+class SparseGP(gpytorch.models.ApproximateGP):
+    """
+    Variational GP on a set of inducing points (SVGP) that is trained on
+    minibatches, so memory and time scale with the number of inducing points
+    instead of the number of training points. Inducing point locations are
+    learned for the rbf kernel and kept fixed for the hamming kernel, whose
+    inputs are discrete.
+
+    Args:
+        inducing_points (torch.Tensor): initial inducing points, e.g. a subset of the training data.
+        fix_mean (bool): Keep the constant mean fixed at 1. Default False.
+        kernel (str): 'rbf' or 'hamming'. Default 'rbf'.
+    """
+
+    def __init__(self, inducing_points, fix_mean=False, kernel="rbf"):
+        variational_distribution = gpytorch.variational.CholeskyVariationalDistribution(
+            inducing_points.size(0)
+        )
+        variational_strategy = gpytorch.variational.VariationalStrategy(
+            self,
+            inducing_points,
+            variational_distribution,
+            learn_inducing_locations=kernel != "hamming",
+        )
+        super(SparseGP, self).__init__(variational_strategy)
+        self.mean_module = gpytorch.means.ConstantMean()
+        self.covar_module = _gp_kernel(kernel)
+        self.mean_module.constant.data.fill_(1)
+        if fix_mean:
+            self.mean_module.constant.requires_grad_(False)
+
+    def forward(self, x):
+        mean_x = self.mean_module(x)
+        covar_x = self.covar_module(x)
+        return gpytorch.distributions.MultivariateNormal(mean_x, covar_x)
+
+
+def predict_gp(model, likelihood, X, batch_size=None, fast_pred_var=False):
+    """
+    Posterior mean and standard deviation of a GP.
+
+    Args:
+        model (GP or SparseGP): trained GP.
+        likelihood (gpytorch.likelihoods.Likelihood): likelihood of the GP.
+        X (torch.Tensor): inputs.
+        batch_size (int): Number of inputs predicted at once. Default None (all).
+        fast_pred_var (bool): Use LOVE predictive variances instead of
+            exact ones, e.g. for scoring many candidates. Default False.
+
+    Returns:
+        tuple: torch.Tensor of means and standard deviations.
+    """
+    y_pred, y_std = [], []
+    for mean, std in predict_gp_batches(
+        model, likelihood, X, batch_size=batch_size, fast_pred_var=fast_pred_var
+    ):
+        y_pred.append(mean)
+        y_std.append(std)
+
+    if not y_pred:
+        return X.new_empty(0), X.new_empty(0)
+    return torch.cat(y_pred), torch.cat(y_std)
+
+
+def predict_gp_batches(model, likelihood, X, batch_size=10000, fast_pred_var=False):
+    """
+    Yields the posterior mean and standard deviation of a GP for batches of X.
+
+    The solve against the training data is computed on the first batch and cached
+    by the model for all following batches (and calls) as long as the model stays
+    in eval mode. With fast_pred_var, predictive variances use a cached low rank
+    (LOVE) decomposition instead of a solve per batch.
+
+    Args:
+        model (GP or SparseGP): trained GP.
+        likelihood (gpytorch.likelihoods.Likelihood): likelihood of the GP.
+        X (torch.Tensor): inputs.
+        batch_size (int): Number of inputs predicted at once. Default 10000, None for all.
+        fast_pred_var (bool): Use LOVE predictive variances instead of
+            exact ones, e.g. for scoring many candidates. Default False.
+
+    Returns:
+        generator: tuples of torch.Tensor of means and standard deviations.
+    """
+    if model.training:
+        model.eval()
+    if likelihood.training:
+        likelihood.eval()
+
+    if batch_size is None:
+        batch_size = max(len(X), 1)
 
-    with torch.no_grad():
-        predictions = likelihood(model(X))
-        y_pred = predictions.mean
-        y_std = predictions.stddev
-        # lower, upper = predictions.confidence_region()
+    for i in range(0, len(X), batch_size):
+        with torch.no_grad(), gpytorch.settings.fast_pred_var(fast_pred_var):
+            predictions = likelihood(model(X[i : i + batch_size]))
+            yield predictions.mean, predictions.stddev
+
+
+def predict_gp_joint(model, X, fast_pred_var=False):
+    """
+    Joint posterior of the latent function of a GP over X, e.g. for batch
+    acquisition functions that need the covariance between candidates.
+
+    Args:
+        model (GP or SparseGP): trained GP.
+        X (torch.Tensor): inputs.
+        fast_pred_var (bool): Use LOVE predictive covariances. Default False.
+
+    Returns:
+        tuple: torch.Tensor of means and the dense covariance matrix.
+    """
+    if model.training:
+        model.eval()
 
-    return y_pred, y_std
+    with torch.no_grad(), gpytorch.settings.fast_pred_var(fast_pred_var):
+        posterior = model(X)
+        return posterior.mean, posterior.covariance_matrix
 
 
 def computeR2(y_true, y_pred):
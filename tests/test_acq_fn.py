@@ -0,0 +1,99 @@
+# This source code is part of the proteusAI package and is distributed
+# under the MIT License.
+
+import numpy as np
+import pytest
+
+from proteusAI.ml_tools.bo_tools.acq_fn import EI, _psd_sqrt, kriging_believer, qEI
+
+current_best = 0.5
+xi = 0.1
+
+
+@pytest.fixture
+def posterior():
+    # correlated GP posterior over 30 candidates (RBF kernel on a line)
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 5, 30))
+    cov = np.exp(-0.5 * (x[:, None] - x[None, :]) ** 2)
+    mean = np.sin(x)
+    return mean, cov
+
+
+def _mc_batch_ei(mean, cov, batch, n_samples=200000, seed=1):
+    """Monte Carlo estimate of E[max(max_i f_i - current_best - xi, 0)] over batch."""
+    rng = np.random.default_rng(seed)
+    samples = rng.multivariate_normal(mean[batch], cov[np.ix_(batch, batch)], n_samples)
+    improvement = np.maximum(samples.max(axis=1) - current_best - xi, 0)
+    return improvement.mean(), improvement.std() / np.sqrt(n_samples)
+
+
+def test_ei_matches_monte_carlo(posterior):
+    mean, cov = posterior
+    std = np.sqrt(np.diag(cov))
+    ei = EI(mean, std, current_best, xi=xi)
+
+    for i in (0, 10, 29):
+        reference, se = _mc_batch_ei(mean, cov, [i])
+        assert abs(ei[i] - reference) < 5 * se + 1e-6
+
+
+def test_psd_sqrt_of_singular_covariance(posterior):
+    _, cov = posterior
+    v = np.random.default_rng(0).standard_normal((30, 3))
+    singular = v @ v.T
+
+    for matrix in (cov, singular):
+        factor = _psd_sqrt(matrix)
+        assert np.allclose(factor @ factor.T, matrix, atol=1e-2 * matrix.max())
+
+
+def test_qei_matches_monte_carlo(posterior):
+    mean, cov = posterior
+    selected, scores = qEI(mean, cov, 4, current_best, xi=xi, n_samples=4096, seed=0)
+
+    assert len(set(selected.tolist())) == 4
+    assert np.all(np.diff(scores) >= 0)
+
+    # the estimate of every partial batch agrees with an independent reference
+    for t in range(1, 5):
+        reference, se = _mc_batch_ei(mean, cov, selected[:t])
+        assert abs(scores[t - 1] - reference) < 0.05 * reference + 5 * se
+
+
+def test_qei_beats_independent_top_ei(posterior):
+    mean, cov = posterior
+    selected, _ = qEI(mean, cov, 4, current_best, xi=xi, n_samples=4096, seed=0)
+    top_ei = np.argsort(EI(mean, np.sqrt(np.diag(cov)), current_best, xi=xi))[-4:]
+
+    assert _mc_batch_ei(mean, cov, selected)[0] >= _mc_batch_ei(mean, cov, top_ei)[0]
+
+
+@pytest.mark.parametrize("noise", [0.0, 0.05])
+def test_kriging_believer_matches_explicit_conditioning(posterior, noise):
+    mean, cov = posterior
+    selected, scores = kriging_believer(mean, cov, 5, current_best, noise=noise)
+
+    # reference: condition the full covariance on the selected points each step
+    best, picked = current_best, []
+    for t in range(5):
+        post = cov.copy()
+        if picked:
+            k = cov[np.ix_(picked, picked)] + noise * np.eye(len(picked))
+            post -= cov[:, picked] @ np.linalg.solve(k, cov[picked, :])
+        std = np.sqrt(np.clip(np.diag(post), 0, None) + noise)
+        score = EI(mean, std, best)
+        score[picked] = -np.inf
+
+        assert selected[t] == np.argmax(score)
+        assert np.isclose(scores[t], score.max())
+        picked.append(int(selected[t]))
+        best = max(best, mean[selected[t]])
+
+
+def test_kriging_believer_first_pick_matches_monte_carlo(posterior):
+    mean, cov = posterior
+    selected, scores = kriging_believer(mean, cov, 3, current_best)
+
+    reference, se = _mc_batch_ei(mean, cov, [selected[0]])
+    assert abs(scores[0] - reference) < 5 * se + 1e-6
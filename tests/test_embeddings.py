@@ -0,0 +1,158 @@
+# This source code is part of the proteusAI package and is distributed
+# under the MIT License.
+
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from proteusAI.io_tools.embeddings import (
+    EmbeddingProjection,
+    EmbeddingStore,
+    ResidueStore,
+    load_embeddings,
+    open_embedding_store,
+)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "esm2")
+    reps = torch.randn(5, 8)
+    names = [f"seq{i}" for i in range(5)]
+
+    store = EmbeddingStore(path)
+    store.append(names, reps)
+
+    reopened = EmbeddingStore(path)
+    assert reopened.names == names
+    assert torch.equal(reopened.get(names), reps)
+    assert torch.equal(reopened.get(["seq3", "seq1"]), reps[[3, 1]])
+
+    loaded_names, loaded = load_embeddings(path, names=["seq4", "seq0"])
+    assert loaded_names == ["seq4", "seq0"]
+    assert torch.equal(torch.stack(loaded), reps[[4, 0]])
+
+
+@pytest.mark.parametrize("dtype, atol", [("float16", 1e-2), ("int8", 5e-2)])
+def test_round_trip_compressed(tmp_path, dtype, atol):
+    path = str(tmp_path / "esm2")
+    reps = torch.rand(4, 16)
+    names = ["a", "b", "c", "d"]
+
+    EmbeddingStore(path, dtype=dtype).append(names, reps)
+
+    store = EmbeddingStore(path)
+    assert store.dtype == dtype
+    assert torch.allclose(store.get(names), reps, atol=atol)
+
+
+tolerances = {"float32": 0, "float16": 1e-2, "bfloat16": 2e-2, "int8": 5e-2}
+
+
+@pytest.mark.parametrize("source", list(tolerances))
+@pytest.mark.parametrize("target", list(tolerances))
+def test_convert(tmp_path, source, target):
+    path = str(tmp_path / "esm2")
+    reps = torch.rand(10, 16) * 2 - 1
+    names = [f"seq{i}" for i in range(10)]
+    EmbeddingStore(path, dtype=source).append(names, reps)
+
+    # small batches, so later batches are read after earlier ones were written
+    EmbeddingStore(path).convert(target, batch_size=3)
+
+    store = EmbeddingStore(path)
+    assert store.dtype == target
+    atol = tolerances[source] + tolerances[target]
+    assert torch.allclose(store.get(names), reps, atol=atol)
+    assert sorted(os.listdir(path)) == sorted(
+        f
+        for f in [
+            EmbeddingStore.index_file,
+            EmbeddingStore.meta_file,
+            store.data_file,
+            store.scale_file if target == "int8" else None,
+        ]
+        if f is not None
+    )
+
+
+def test_projection_refresh(tmp_path):
+    path = str(tmp_path / "esm2")
+    reps = torch.randn(6, 8)
+    names = list("abcdef")
+    EmbeddingStore(path).append(names, reps)
+
+    reader = EmbeddingStore(path)
+    projection = EmbeddingProjection.fit(reps, n_components=3)
+    EmbeddingStore(path).set_projection(projection)
+    assert reader.refresh().get(names).shape == (6, 3)
+
+    EmbeddingStore(path).set_projection(None)
+    assert torch.equal(reader.refresh().get(names), reps)
+
+
+def test_resume_after_reopen(tmp_path):
+    path = str(tmp_path / "esm2")
+    reps = torch.randn(6, 4)
+
+    EmbeddingStore(path).append(["a", "b", "c"], reps[:3])
+    store = EmbeddingStore(path)
+    store.append(["d", "e", "f"], reps[3:])
+
+    assert len(EmbeddingStore(path)) == 6
+    assert torch.equal(EmbeddingStore(path).get(list("abcdef")), reps)
+
+
+def test_resume_after_interrupted_append(tmp_path):
+    path = str(tmp_path / "esm2")
+    reps = torch.randn(4, 4)
+    EmbeddingStore(path).append(["a", "b"], reps[:2])
+
+    # rows and index lines written without the manifest, as by a killed append
+    with open(os.path.join(path, EmbeddingStore.data_file), "ab") as f:
+        f.write(np.ones((3, 4), dtype=np.float32).tobytes())
+    with open(os.path.join(path, EmbeddingStore.index_file), "a") as f:
+        f.write("lost\t2\nlo")
+
+    store = EmbeddingStore(path)
+    assert store.names == ["a", "b"]
+    assert "lost" not in store
+
+    store.append(["c", "d"], reps[2:])
+    reopened = EmbeddingStore(path)
+    assert reopened.names == ["a", "b", "c", "d"]
+    assert torch.equal(reopened.get(["a", "b", "c", "d"]), reps)
+    assert os.path.getsize(os.path.join(path, EmbeddingStore.data_file)) == 4 * 4 * 4
+
+
+def test_migrate_pt_files(tmp_path):
+    path = str(tmp_path / "esm2")
+    os.makedirs(path)
+    reps = {f"seq{i}": torch.randn(8) for i in range(3)}
+    for name, rep in reps.items():
+        torch.save(rep, os.path.join(path, f"{name}.pt"))
+
+    store = open_embedding_store(path)
+    assert EmbeddingStore.exists(path)
+    assert sorted(store.names) == sorted(reps)
+    for name, rep in reps.items():
+        assert torch.equal(store.get([name])[0], rep)
+
+    # migrated files are skipped when the store is opened again
+    assert EmbeddingStore(path).migrate() == 0
+
+
+def test_residue_store_round_trip(tmp_path):
+    path = str(tmp_path / "esm2_per_residue")
+    reps = [torch.randn(length, 4) for length in (5, 2, 7)]
+
+    ResidueStore(path).append(["a", "b", "c"], reps)
+
+    store = open_embedding_store(path)
+    assert isinstance(store, ResidueStore)
+    for rep, loaded in zip(reps, store.get(["a", "b", "c"])):
+        assert torch.equal(rep, loaded)
+
+    with pytest.raises(ValueError):
+        EmbeddingStore(path)
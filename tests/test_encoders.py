@@ -0,0 +1,40 @@
+# This source code is part of the proteusAI package and is distributed
+# under the MIT License.
+
+import pytest
+import torch
+
+from proteusAI.ml_tools.torch_tools.torch_tools import (
+    one_hot_encoder,
+    sparse_one_hot_encoder,
+    sparse_to_codes,
+)
+
+sequences = ["MKTAYIAK", "MKTA", "MXTAYIBKQR", ""]
+
+
+@pytest.mark.parametrize("padding", [None, 12])
+def test_sparse_matches_dense(padding):
+    dense = one_hot_encoder(sequences, padding=padding)
+    sparse = sparse_one_hot_encoder(sequences, padding=padding)
+
+    assert sparse.shape == (len(sequences), dense.shape[1] * dense.shape[2])
+    assert torch.equal(
+        torch.from_numpy(sparse.toarray()), dense.reshape(len(sequences), -1)
+    )
+
+
+def test_sparse_matches_dense_single_sequence():
+    dense = one_hot_encoder("MKTAYIAK")
+    sparse = sparse_one_hot_encoder("MKTAYIAK")
+
+    assert torch.equal(torch.from_numpy(sparse.toarray()[0]), dense.reshape(-1))
+
+
+def test_sparse_to_codes():
+    codes = sparse_to_codes(sparse_one_hot_encoder(sequences))
+    dense = one_hot_encoder(sequences)
+
+    # residues map to their alphabet index, unknown residues and padding to -1
+    expected = torch.where(dense.sum(-1) > 0, dense.argmax(-1), -1).float()
+    assert torch.equal(codes, expected)
@@ -0,0 +1,85 @@
+# This source code is part of the proteusAI package and is distributed
+# under the MIT License.
+
+import esm
+import pytest
+import torch
+
+from proteusAI.ml_tools.esm_tools.esm_tools import (
+    _group_index,
+    _mask_tokens,
+    get_mutant_logits,
+    mask_groups,
+    mask_positions,
+)
+
+seq = "MKTAYIAKQRQISFVKSHFSRQ"
+alphabet = esm.data.Alphabet.from_architecture("ESM-1b")
+
+
+@pytest.fixture(scope="module")
+def model():
+    # small randomly initialized ESM-2, no pretrained weights needed
+    torch.manual_seed(0)
+    model = esm.model.esm2.ESM2(
+        num_layers=2, embed_dim=32, attention_heads=2, alphabet=alphabet
+    )
+    return model.eval()
+
+
+def _tokens(sequences):
+    _, _, tokens = alphabet.get_batch_converter()(
+        [(str(i), s) for i, s in enumerate(sequences)]
+    )
+    return tokens
+
+
+def test_mask_tokens_matches_masked_strings():
+    groups = mask_groups(len(seq))
+    rows, positions = _group_index(groups)
+    offset = int(alphabet.prepend_bos)
+
+    tokens = _mask_tokens(
+        _tokens([seq]), len(groups), rows, positions + offset, alphabet
+    )
+
+    assert torch.equal(tokens, _tokens(mask_positions(seq)))
+
+
+def test_multi_mask_tokens_match_masked_strings():
+    groups = mask_groups(len(seq), mode="multi_mask", mask_k=4)
+    rows, positions = _group_index(groups)
+    offset = int(alphabet.prepend_bos)
+
+    tokens = _mask_tokens(
+        _tokens([seq]), len(groups), rows, positions + offset, alphabet
+    )
+
+    masked = []
+    for group in groups:
+        residues = list(seq)
+        for pos in group:
+            residues[pos] = "<mask>"
+        masked.append("".join(residues))
+    assert torch.equal(tokens, _tokens(masked))
+
+
+def test_masked_marginal_logits_match_masked_strings(model):
+    logits, _ = get_mutant_logits(seq, model=model, batch_size=8)
+
+    with torch.no_grad():
+        reference = model(_tokens(mask_positions(seq)))["logits"]
+    positions = torch.arange(len(seq))
+    reference = reference[positions, positions + int(alphabet.prepend_bos)]
+
+    assert logits.shape == (1, len(seq), len(alphabet.all_toks))
+    assert torch.allclose(logits[0], reference, atol=1e-5)
+
+
+def test_wt_marginal_logits_match_unmasked_pass(model):
+    logits, _ = get_mutant_logits(seq, model=model, mode="wt_marginal")
+
+    with torch.no_grad():
+        reference = model(_tokens([seq]))["logits"][0, 1 : len(seq) + 1]
+
+    assert torch.allclose(logits[0], reference, atol=1e-5)
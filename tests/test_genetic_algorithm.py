@@ -0,0 +1,99 @@
+# This source code is part of the proteusAI package and is distributed
+# under the MIT License.
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+import torch
+from scipy.spatial.distance import cdist
+
+from proteusAI.ml_tools.bo_tools.genetic_algorithm import (
+    diversity_score_incremental,
+    k_center_greedy,
+    pairwise_distances,
+    precompute_distances,
+    simulated_annealing,
+)
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return [rng.standard_normal(16).astype(np.float32) for _ in range(12)]
+
+
+def _diversity(distance_matrix, selection):
+    """Baseline diversity score: sum of the pairwise distances within the selection."""
+    selection = list(selection)
+    return distance_matrix[np.ix_(selection, selection)].sum() / 2
+
+
+def test_pairwise_distances_match_cdist(vectors):
+    x = np.stack(vectors)
+    reference = cdist(x, x)
+
+    assert np.allclose(pairwise_distances(x, block_size=5), reference, atol=1e-4)
+    # distances of identical rows are only zeroed within a, elsewhere the float32
+    # cancellation error near zero is amplified by the square root
+    assert np.allclose(pairwise_distances(x[:3], x), reference[:3], atol=1e-2)
+    assert np.allclose(precompute_distances(torch.from_numpy(x)), reference, atol=1e-4)
+
+
+def test_diversity_score_incremental(vectors):
+    distances = precompute_distances(vectors)
+    selection = [0, 3, 5, 7]
+    score = _diversity(distances, selection)
+
+    swapped = diversity_score_incremental(score, selection, 9, 5, distances)
+    assert np.isclose(swapped, _diversity(distances, [0, 3, 9, 7]))
+
+
+def test_simulated_annealing_matches_baseline_score(vectors):
+    random.seed(0)
+    distances = precompute_distances(vectors)
+    selection, score = simulated_annealing(vectors, 4, max_iterations=2000)
+
+    assert len(set(selection)) == 4
+    assert np.isclose(score, _diversity(distances, selection), rtol=1e-4)
+
+    optimum = max(
+        _diversity(distances, s) for s in itertools.combinations(range(12), 4)
+    )
+    assert np.isclose(score, optimum, rtol=1e-4)
+
+
+def test_simulated_annealing_selects_all_vectors(vectors):
+    distances = precompute_distances(vectors)
+    selection, score = simulated_annealing(vectors, 20)
+
+    assert selection == list(range(12))
+    assert np.isclose(score, _diversity(distances, selection), rtol=1e-4)
+
+
+def test_k_center_greedy_matches_baseline_score(vectors):
+    random.seed(0)
+    distances = precompute_distances(vectors)
+    selection, score = k_center_greedy(vectors, 4)
+
+    assert len(set(selection)) == 4
+    assert np.isclose(score, _diversity(distances, selection), rtol=1e-4)
+
+    # greedy max-min selection is a 2-approximation of the best minimum distance
+    def min_distance(s):
+        return min(distances[i, j] for i, j in itertools.combinations(s, 2))
+
+    optimum = max(min_distance(s) for s in itertools.combinations(range(12), 4))
+    assert min_distance(selection) >= optimum / 2
+
+
+def test_diverse_selection_beats_random(vectors):
+    random.seed(0)
+    distances = precompute_distances(vectors)
+    random_score = np.mean(
+        [_diversity(distances, random.sample(range(12), 4)) for _ in range(100)]
+    )
+
+    assert simulated_annealing(vectors, 4, max_iterations=2000)[1] > random_score
+    assert k_center_greedy(vectors, 4)[1] > random_score